@@ -0,0 +1,232 @@
+import os
+import json
+import sqlite3
+import argparse
+import threading
+from functools import lru_cache
+from puzzle_ir import parse_puzzle, OPS
+from save_results import VERDICTS, NO_VERDICT, verdict_code
+
+DEFAULT_ANALYTICS_PATH = "resultados/analytics.sqlite"
+
+# Arquivos de resultado e o modelo das linhas antigas, gravadas antes de existir o campo "model"
+RESULT_FILES = {
+    "resultados/results.jsonl": "gemini-2.5-flash",
+    "resultados/results_gpt.jsonl": "gpt-4o-mini",
+}
+
+# Colunas da matriz de confusão (linhas: veredito do Z3; colunas: resposta da LLM)
+CONFUSION_LABELS = VERDICTS + ("sem resposta",)
+
+
+@lru_cache(maxsize=4096)
+def puzzle_ops(puzzle_name, puzzles_dir="puzzles"):
+    """Statement types (puzzle_ir.OPS names) used by a puzzle file; () if it cannot be read."""
+    try:
+        with open(os.path.join(puzzles_dir, puzzle_name), "r", encoding="utf-8") as f:
+            ir = parse_puzzle(f.read().strip())
+    except (OSError, ValueError):
+        return ()
+    return tuple(sorted({OPS[op] for _, op, _, _ in ir.statements}))
+
+
+class Analytics:
+    """
+    Materialised aggregates over the results files (SQLite): the latest result
+    per (puzzle, model), accuracy by model/n/statement type and confusion
+    matrices. catch_up() applies only the lines appended since the last call,
+    so reading a summary never rescans the history; it runs on demand (see
+    summary()), never on the path that writes the results. Like the notebook,
+    only the latest result of each (puzzle, model) counts: a newer one replaces
+    the old contribution.
+    """
+
+    def __init__(self, path=DEFAULT_ANALYTICS_PATH, puzzles_dir="puzzles"):
+        dir_path = os.path.dirname(path) or "."
+        os.makedirs(dir_path, exist_ok=True)
+        self.puzzles_dir = puzzles_dir
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS offsets (path TEXT PRIMARY KEY, offset INTEGER);"
+            "CREATE TABLE IF NOT EXISTS latest (puzzle TEXT, model TEXT, timestamp TEXT, match INTEGER,"
+            " n INTEGER, ops TEXT, llm TEXT, z3 TEXT, PRIMARY KEY (puzzle, model));"
+            "CREATE TABLE IF NOT EXISTS acc_n (model TEXT, n INTEGER, acertos INTEGER, total INTEGER,"
+            " PRIMARY KEY (model, n));"
+            "CREATE TABLE IF NOT EXISTS acc_op (model TEXT, op TEXT, acertos INTEGER, total INTEGER,"
+            " PRIMARY KEY (model, op));"
+            "CREATE TABLE IF NOT EXISTS confusion (model TEXT, z3 INTEGER, llm INTEGER, total INTEGER,"
+            " PRIMARY KEY (model, z3, llm));"
+        )
+
+    # ------------------------------------------------------------
+    # Atualização incremental
+    # ------------------------------------------------------------
+
+    def catch_up(self, results_path, default_model=None):
+        """Applies the complete lines appended to results_path since the last call; returns how many."""
+        if not os.path.exists(results_path):
+            return 0
+        default_model = default_model or RESULT_FILES.get(results_path, os.path.basename(results_path))
+        key = os.path.abspath(results_path)
+        with self._lock:
+            # BEGIN IMMEDIATE: um processo por vez lê a partir do offset salvo
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT offset FROM offsets WHERE path = ?", (key,)).fetchone()
+                offset = row[0] if row else 0
+                if os.path.getsize(results_path) < offset:
+                    offset = 0  # arquivo recriado: reaplicar é seguro (só a última linha conta)
+                with open(results_path, "rb") as f:
+                    f.seek(offset)
+                    data = f.read()
+                complete = data[:data.rfind(b"\n") + 1]
+                lines = complete.splitlines()
+                try:
+                    # Última linha sem "\n": entra se já for um JSON completo (senão ainda está sendo escrita)
+                    json.loads(data[len(complete):])
+                    lines.append(data[len(complete):])
+                except ValueError:
+                    data = complete
+                count = 0
+                for line in lines:
+                    if line.strip():
+                        self._apply(json.loads(line), default_model)
+                        count += 1
+                self._db.execute("INSERT OR REPLACE INTO offsets VALUES (?, ?)", (key, offset + len(data)))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return count
+
+    def catch_up_all(self):
+        return sum(self.catch_up(path, model) for path, model in RESULT_FILES.items())
+
+    def _apply(self, row, default_model):
+        model = row.get("model") or default_model
+        puzzle = row["puzzle"]
+        timestamp = row.get("timestamp") or ""
+        old = self._db.execute("SELECT timestamp, match, n, ops, llm, z3 FROM latest WHERE puzzle = ? AND model = ?",
+                               (puzzle, model)).fetchone()
+        if old is not None:
+            if old[0] > timestamp:
+                return
+            self._contribute(model, old[1], old[2], json.loads(old[3]), json.loads(old[4]), json.loads(old[5]), -1)
+
+        llm, z3 = row.get("llm") or {}, row["z3_consequencias"]
+        ops = list(puzzle_ops(puzzle, self.puzzles_dir))
+        match = int(bool(row.get("match")))
+        self._db.execute("INSERT OR REPLACE INTO latest VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         (puzzle, model, timestamp, match, len(z3), json.dumps(ops),
+                          json.dumps(llm, ensure_ascii=False), json.dumps(z3, ensure_ascii=False)))
+        self._contribute(model, match, len(z3), ops, llm, z3, +1)
+
+    def _contribute(self, model, match, n, ops, llm, z3, sign):
+        upsert = ("INSERT INTO {0} VALUES (?, ?, ?, ?) ON CONFLICT ({1}) DO UPDATE"
+                  " SET acertos = acertos + excluded.acertos, total = total + excluded.total")
+        self._db.execute(upsert.format("acc_n", "model, n"), (model, n, sign * match, sign))
+        for op in ops:
+            self._db.execute(upsert.format("acc_op", "model, op"), (model, op, sign * match, sign))
+        for person, status in z3.items():
+            self._db.execute(
+                "INSERT INTO confusion VALUES (?, ?, ?, ?) ON CONFLICT (model, z3, llm)"
+                " DO UPDATE SET total = total + excluded.total",
+                (model, verdict_code(status), verdict_code(llm.get(person)), sign))
+
+    # ------------------------------------------------------------
+    # Leitura (tabelas agregadas, sem varrer o histórico)
+    # ------------------------------------------------------------
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def accuracy_by_model(self):
+        rows = self._query("SELECT model, SUM(acertos), SUM(total) FROM acc_n GROUP BY model HAVING SUM(total) > 0")
+        return {model: {"acertos": a, "total": t} for model, a, t in rows}
+
+    def accuracy_by_n(self, model):
+        rows = self._query("SELECT n, acertos, total FROM acc_n WHERE model = ? AND total > 0 ORDER BY n", (model,))
+        return {n: {"acertos": a, "total": t} for n, a, t in rows}
+
+    def accuracy_by_op(self, model):
+        rows = self._query("SELECT op, acertos, total FROM acc_op WHERE model = ? AND total > 0 ORDER BY op", (model,))
+        return {op: {"acertos": a, "total": t} for op, a, t in rows}
+
+    def confusion(self, model):
+        """Matrix[z3][llm] of per-person verdicts, indexed like VERDICTS / CONFUSION_LABELS."""
+        matrix = [[0] * len(CONFUSION_LABELS) for _ in VERDICTS]
+        for z3, llm, total in self._query("SELECT z3, llm, total FROM confusion WHERE model = ?", (model,)):
+            if z3 != NO_VERDICT:
+                matrix[z3][llm if llm != NO_VERDICT else len(VERDICTS)] += total
+        return matrix
+
+    def latest(self, model=None, match=None):
+        """Latest result of each (puzzle, model), optionally only one model and/or only hits/misses."""
+        sql = "SELECT puzzle, model, timestamp, match, n, llm, z3 FROM latest WHERE 1 = 1"
+        params = []
+        if model is not None:
+            sql += " AND model = ?"
+            params.append(model)
+        if match is not None:
+            sql += " AND match = ?"
+            params.append(int(match))
+        rows = self._query(sql + " ORDER BY model, puzzle", params)
+        return [{"puzzle": p, "model": m, "timestamp": ts, "match": bool(ok), "n": n,
+                 "llm": json.loads(llm), "z3_consequencias": json.loads(z3)}
+                for p, m, ts, ok, n, llm, z3 in rows]
+
+    def summary(self):
+        """Everything the notebook/web UI show, per model."""
+        return {
+            model: dict(acc, por_n=self.accuracy_by_n(model), por_tipo=self.accuracy_by_op(model),
+                        confusao=self.confusion(model))
+            for model, acc in self.accuracy_by_model().items()
+        }
+
+    def close(self):
+        self._db.close()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_analytics():
+    """Process-wide aggregates at resultados/analytics.sqlite, opened on first use."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Analytics()
+        return _default
+
+
+def summary():
+    """Up-to-date summary: applies any new result lines, then reads the aggregates."""
+    stats = default_analytics()
+    stats.catch_up_all()
+    return stats.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumo dos resultados (agregados materializados)")
+    parser.add_argument("--json", action="store_true", help="Imprime o resumo em JSON")
+    args = parser.parse_args()
+
+    resumo = summary()
+    if args.json:
+        print(json.dumps(resumo, ensure_ascii=False, indent=2))
+        return
+    if not resumo:
+        print("Nenhum resultado registrado.")
+    for model, dados in resumo.items():
+        print(f"{model}: {dados['acertos']}/{dados['total']} acertos")
+        for n, acc in dados["por_n"].items():
+            print(f"  n={n}: {acc['acertos']}/{acc['total']}")
+        for op, acc in dados["por_tipo"].items():
+            print(f"  {op}: {acc['acertos']}/{acc['total']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from puzzle_ir import parse_puzzle, NO_REF, PARSER_VERSION
+from z3 import is_true
+from solverz3 import SOLVER_VERSION
+from backends import solve_ir
+from sqlite_lru import evict_lru
+
+CACHE_VERSION = f"parser{PARSER_VERSION}-solver{SOLVER_VERSION}"
+DEFAULT_CACHE_PATH = "resultados/answer_cache.sqlite"
+
+# Limite de folhas exploradas na rotulação canônica de puzzles muito simétricos
+MAX_CANONICAL_LEAVES = 256
+
+
+def _refine(ir, colors):
+    """
+    Colour refinement: each person's colour is recomputed from the statements it
+    takes part in (op, role and colours of the others) until the partition is
+    stable. Colours are ranks of sorted signatures, so they do not depend on names.
+    """
+    n = len(ir.names)
+    while True:
+        signatures = [[colors[v]] for v in range(n)]
+        for s, op, r1, r2 in ir.statements:
+            shape = (op, colors[s], colors[r1] if r1 != NO_REF else -1, colors[r2] if r2 != NO_REF else -1)
+            for role, v in enumerate((s, r1, r2)):
+                if v != NO_REF:
+                    signatures[v].append((role,) + shape)
+        signatures = [(sig[0], tuple(sorted(sig[1:]))) for sig in signatures]
+        ranks = {sig: i for i, sig in enumerate(sorted(set(signatures)))}
+        refined = [ranks[sig] for sig in signatures]
+        if len(ranks) == len(set(colors)):
+            return refined
+        colors = refined
+
+
+def _encode(ir, order):
+    """Statements relabelled so that person order[i] becomes i, sorted."""
+    position = {v: i for i, v in enumerate(order)}
+    position[NO_REF] = NO_REF
+    return tuple(sorted((position[s], op, position[r1], position[r2]) for s, op, r1, r2 in ir.statements))
+
+
+def _swap_is_automorphism(ir, incident, a, b):
+    """True if exchanging people a and b maps the puzzle's statements onto themselves."""
+    swap = {a: b, b: a}
+    involved = [ir.statements[i] for i in set(incident[a]) | set(incident[b])]
+    swapped = [tuple(swap.get(x, x) if k != 1 else x for k, x in enumerate(st)) for st in involved]
+    return sorted(involved) == sorted(swapped)
+
+
+def canonical_form(ir):
+    """
+    Canonical labelling of a puzzle up to renaming people.
+    Returns a tuple (encoding, order): order[i] is the original index of the person
+    placed at canonical position i, and encoding is the relabelled statements.
+    Two puzzles that differ only by names get the same encoding (if the search
+    hits MAX_CANONICAL_LEAVES the encoding is still a valid key, just not shared).
+    """
+    n = len(ir.names)
+    best = None
+    leaves = 0
+    incident = [[] for _ in range(n)]
+    for i, (s, _, r1, r2) in enumerate(ir.statements):
+        for v in (s, r1, r2):
+            if v != NO_REF:
+                incident[v].append(i)
+
+    def search(colors):
+        nonlocal best, leaves
+        colors = _refine(ir, colors)
+        if len(set(colors)) == n:
+            leaves += 1
+            order = sorted(range(n), key=lambda v: colors[v])
+            candidate = (_encode(ir, order), order)
+            if best is None or candidate[0] < best[0]:
+                best = candidate
+            return
+        # Individualiza cada pessoa da menor classe empatada
+        sizes = {}
+        for c in colors:
+            sizes[c] = sizes.get(c, 0) + 1
+        target = min(c for c, size in sizes.items() if size > 1)
+        first = None
+        for v in range(n):
+            if colors[v] != target or leaves >= MAX_CANONICAL_LEAVES:
+                continue
+            # Pessoas intercambiáveis com a primeira levam às mesmas codificações
+            if first is not None and _swap_is_automorphism(ir, incident, first, v):
+                continue
+            first = v if first is None else first
+            search([2 * c if u == v else 2 * c + 1 for u, c in enumerate(colors)])
+
+    search([0] * n)
+    return best
+
+
+def _cache_key(ir, encoding):
+    return hashlib.sha256(f"{CACHE_VERSION}|{len(ir.names)}|{encoding}".encode()).hexdigest()
+
+
+def _model_value(value):
+    """generic_solver values as JSON: Z3 BoolRef/bool -> bool, unassigned -> None."""
+    if value is None or isinstance(value, bool):
+        return value
+    return bool(is_true(value))
+
+
+class AnswerCache:
+    """
+    Persistent answer key (SQLite) for logical_consequences and generic_solver,
+    keyed by the canonical hash of the parsed puzzle, with LRU eviction.
+    Entries from other parser/solver versions are dropped when the cache opens.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=100_000):
+        dir_path = os.path.dirname(path) or "."
+        os.makedirs(dir_path, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                " key TEXT PRIMARY KEY, version TEXT, model TEXT, consequences TEXT, last_used REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used)")
+            self._db.execute("DELETE FROM answers WHERE version != ?", (CACHE_VERSION,))
+            self._count = self._db.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    @staticmethod
+    def key(ir):
+        """Content address of a puzzle: hash of its canonical encoding and the versions."""
+        return _cache_key(ir, canonical_form(ir)[0])
+
+    def get(self, ir):
+        """Returns (model, consequences) named for this puzzle, or None on a miss."""
+        encoding, order = canonical_form(ir)
+        key = _cache_key(ir, encoding)
+        with self._lock:
+            row = self._db.execute("SELECT model, consequences FROM answers WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            with self._db:
+                self._db.execute("UPDATE answers SET last_used = ? WHERE key = ?", (time.time(), key))
+
+        model, consequences = json.loads(row[0]), json.loads(row[1])
+        # Volta da ordem canônica para os nomes (e a ordem) deste puzzle
+        positions = {v: i for i, v in enumerate(order)}
+        if isinstance(model, list):
+            model = {name: model[positions[v]] for v, name in enumerate(ir.names)}
+        consequences = {name: consequences[positions[v]] for v, name in enumerate(ir.names)}
+        return model, consequences
+
+    def put(self, ir, model, consequences):
+        """Stores the answers of a puzzle in canonical order (LRU-bounded, see sqlite_lru)."""
+        encoding, order = canonical_form(ir)
+        key = _cache_key(ir, encoding)
+        names = [ir.names[v] for v in order]
+        if isinstance(model, dict):
+            model = [_model_value(model[name]) for name in names]
+        consequences = [consequences[name] for name in names]
+
+        with self._lock, self._db:
+            new = self._db.execute("SELECT 1 FROM answers WHERE key = ?", (key,)).fetchone() is None
+            self._db.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?)",
+                (key, CACHE_VERSION, json.dumps(model, ensure_ascii=False),
+                 json.dumps(consequences, ensure_ascii=False), time.time()),
+            )
+            self._count += new
+            if self._count > self.max_entries:
+                self._count = evict_lru(self._db, "answers", self.max_entries)
+
+    def close(self):
+        self._db.close()
+
+
+_default_cache = None
+
+
+def default_cache():
+    """Process-wide cache at resultados/answer_cache.sqlite, opened on first use."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = AnswerCache()
+    return _default_cache
+
+
+def solve_cached(puzzle_text, cache=None):
+    """
+    generic_solver model and logical_consequences of a puzzle text, looked up in
+    the answer cache first and solved (then stored) only on a miss. The answers
+    are the Z3 ground truth the pipeline labels as such, so they always come
+    from the z3 backend. Returns a tuple (model, consequences).
+    """
+    cache = cache or default_cache()
+    ir = parse_puzzle(puzzle_text)
+    hit = cache.get(ir)
+    if hit is not None:
+        return hit
+    model, consequences = solve_ir(ir, backend="z3")
+    cache.put(ir, model, consequences)
+    return model, consequences
@@ -5,12 +5,21 @@ import sys
 import subprocess
 import importlib.util
 import inspect
-from flask import Flask, render_template, request, Response, stream_with_context
+import threading
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from flask import Flask, render_template, request, Response, stream_with_context, jsonify
+from pipeline import z3_consequences
+import analytics
 from typing import Iterable
 
 app = Flask(__name__)
 ROOT = os.path.dirname(__file__)
 
+# SSE sem cache nem buffering de proxy: cada linha chega ao navegador assim que é gerada
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 # helper: convert generator/iterable into SSE text/event-stream
 def sse_wrap(iterable: Iterable[str]):
     for item in iterable:
@@ -67,6 +76,49 @@ def import_module_solve(module_name: str):
             return fn
     return None
 
+class SolverRegistry:
+    """
+    Warm cache of solver callables: each module is imported once and reused by
+    every request. With hot_reload, a module is re-imported only when its file's
+    mtime changes (one os.stat per request instead of a full exec_module).
+    """
+
+    def __init__(self, root: str, hot_reload: bool = True):
+        self.root = root
+        self.hot_reload = hot_reload
+        self._entries = {}  # module -> (mtime, callable or None)
+        self._lock = threading.Lock()
+
+    def _mtime(self, module_name: str):
+        try:
+            return os.path.getmtime(os.path.join(self.root, f"{module_name}.py"))
+        except OSError:
+            return None
+
+    def get(self, module_name: str):
+        """Pre-resolved solve() of module_name, or None (-> subprocess fallback)."""
+        entry = self._entries.get(module_name)
+        if entry is not None and not self.hot_reload:
+            return entry[1]
+        mtime = self._mtime(module_name)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+        with self._lock:
+            entry = self._entries.get(module_name)
+            if entry is None or entry[0] != mtime:
+                entry = (mtime, import_module_solve(module_name) if mtime is not None else None)
+                self._entries[module_name] = entry
+        return entry[1]
+
+    def preload(self, module_names: Iterable[str]):
+        for module_name in module_names:
+            self.get(module_name)
+
+# Solvers da UI carregados uma vez na inicialização (SOLVER_HOT_RELOAD=0 desliga o recarregamento por mtime)
+SOLVER_MODULES = ("main", "main_gpt")
+registry = SolverRegistry(ROOT, hot_reload=os.getenv("SOLVER_HOT_RELOAD", "1") != "0")
+registry.preload(SOLVER_MODULES)
+
 @app.route("/")
 def index():
     return render_template("index.html")
@@ -82,7 +134,7 @@ def stream():
     module = request.args.get("module", "main")
     args = request.args.get("args", "")
 
-    solver_fn = import_module_solve(module)
+    solver_fn = registry.get(module)
 
     if solver_fn:
         def gen():
@@ -106,7 +158,7 @@ def stream():
             else:
                 yield str(result)
 
-        return Response(stream_with_context(sse_wrap(gen())), mimetype="text/event-stream")
+        return Response(stream_with_context(sse_wrap(gen())), mimetype="text/event-stream", headers=SSE_HEADERS)
 
     # fallback: run module as subprocess and stream stdout lines
     def proc_gen():
@@ -116,7 +168,145 @@ def stream():
         except Exception as e:
             yield f"ERROR running subprocess: {e}"
 
-    return Response(stream_with_context(sse_wrap(proc_gen())), mimetype="text/event-stream")
+    return Response(stream_with_context(sse_wrap(proc_gen())), mimetype="text/event-stream", headers=SSE_HEADERS)
+
+# ============================================================
+# JSON API: gabarito (Z3) de textos de puzzle arbitrários
+# ============================================================
+
+API_WORKERS = int(os.getenv("API_WORKERS", os.cpu_count() or 2))
+# Puzzles em andamento por pool no /api/solve/batch (limita a memória em lotes NDJSON grandes)
+BATCH_WINDOW = 4 * API_WORKERS
+
+_api_pool = None
+_inflight = {}  # texto do puzzle -> Future em andamento (coalescência)
+_inflight_lock = threading.Lock()
+
+def _pool():
+    global _api_pool
+    with _inflight_lock:
+        if _api_pool is None:
+            # spawn: os workers não herdam as threads do servidor
+            _api_pool = ProcessPoolExecutor(API_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _api_pool
+
+def _forget(puzzle, future):
+    with _inflight_lock:
+        if _inflight.get(puzzle) is future:
+            del _inflight[puzzle]
+
+def submit_puzzle(puzzle: str):
+    """
+    Future with the consequences of a puzzle text, solved on the worker pool.
+    Identical texts requested while one is still running share the same future.
+    """
+    puzzle = puzzle.strip()
+    pool = _pool()
+    with _inflight_lock:
+        future = _inflight.get(puzzle)
+        if future is None:
+            future = pool.submit(z3_consequences, puzzle)
+            _inflight[puzzle] = future
+            future.add_done_callback(lambda f, key=puzzle: _forget(key, f))
+    return future
+
+def _answer(future, **extra):
+    try:
+        consequencias = future.result()
+        return dict(extra, n=len(consequencias), consequencias=consequencias)
+    except Exception as e:
+        return dict(extra, erro=str(e) or type(e).__name__)
+
+def _json_items():
+    """Items of a JSON batch body (list or {"puzzles": [...]}); ValueError with the message if malformed."""
+    try:
+        data = json.loads(request.get_data(as_text=True))
+    except ValueError as e:
+        raise ValueError(f"JSON inválido: {e}")
+    if isinstance(data, dict):
+        if "puzzles" not in data:
+            raise ValueError('Objeto JSON sem a chave "puzzles"')
+        data = data["puzzles"]
+    if not isinstance(data, list):
+        raise ValueError("Esperada uma lista de puzzles")
+    return data
+
+def _ndjson_items():
+    """Items of an NDJSON body, one per line; a malformed line becomes a ValueError item (its error row)."""
+    for line in request.stream:
+        try:
+            line = line.decode("utf-8").strip()
+            if line:
+                yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"Linha NDJSON inválida: {e}")
+
+def _batch_item(item):
+    """(id, puzzle text) of a batch item: a text or {"id", "puzzle"}; ValueError if it is neither."""
+    if isinstance(item, ValueError):
+        raise item
+    puzzle_id = item.get("id") if isinstance(item, dict) else None
+    puzzle = item.get("puzzle") if isinstance(item, dict) else item
+    if not isinstance(puzzle, str) or not puzzle.strip():
+        raise ValueError('Item sem puzzle: use um texto ou {"id": ..., "puzzle": "<texto>"}')
+    return puzzle_id, puzzle
+
+@app.route("/api/solve", methods=["POST"])
+def api_solve():
+    """Body: {"puzzle": "<texto>"} or the puzzle as text/plain. Returns {n, consequencias} or {erro}."""
+    if request.is_json:
+        puzzle = (request.get_json() or {}).get("puzzle")
+    else:
+        puzzle = request.get_data(as_text=True)
+    if not puzzle or not puzzle.strip():
+        return jsonify(erro="Nenhum puzzle enviado"), 400
+    answer = _answer(submit_puzzle(puzzle))
+    return jsonify(answer), 400 if "erro" in answer else 200
+
+@app.route("/api/solve/batch", methods=["POST"])
+def api_solve_batch():
+    """
+    Solves many puzzles and streams one NDJSON line per puzzle as soon as it is
+    solved (completion order, with its index and optional id). A malformed JSON
+    body is rejected with 400 before streaming; a bad NDJSON line or item gets
+    its own {"index", "erro"} line and the batch goes on.
+    """
+    if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+        items = _ndjson_items()
+    else:
+        try:
+            items = _json_items()
+        except ValueError as e:
+            return jsonify(erro=str(e)), 400
+
+    def gen():
+        pending = {}
+        for index, item in enumerate(items):
+            try:
+                puzzle_id, puzzle = _batch_item(item)
+            except ValueError as e:
+                puzzle_id = item.get("id") if isinstance(item, dict) else None
+                yield json.dumps({"index": index, "id": puzzle_id, "erro": str(e)}, ensure_ascii=False) + "\n"
+                continue
+            # Puzzles repetidos no lote compartilham o mesmo future
+            pending.setdefault(submit_puzzle(puzzle), []).append((index, puzzle_id))
+            while len(pending) >= BATCH_WINDOW:
+                yield from _drain(pending)
+        while pending:
+            yield from _drain(pending)
+
+    return Response(stream_with_context(gen()), mimetype="application/x-ndjson")
+
+def _drain(pending):
+    done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+    for future in done:
+        for index, puzzle_id in pending.pop(future):
+            yield json.dumps(_answer(future, index=index, id=puzzle_id), ensure_ascii=False) + "\n"
+
+@app.route("/api/summary")
+def api_summary():
+    """Accuracy per model, n and statement type plus confusion matrices, from the analytics aggregates."""
+    return jsonify(analytics.summary())
 
 if __name__ == "__main__":
     app.run(debug=True, threaded=True)
@@ -0,0 +1,206 @@
+# app_async.py — modo de servidor assíncrono (ASGI) da interface web
+import os
+import asyncio
+import argparse
+import importlib
+import mimetypes
+import multiprocessing
+from urllib.parse import parse_qs
+from concurrent.futures import ProcessPoolExecutor
+from pipeline import solver_events_async, z3_consequences, parse_selection, select_puzzles
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(ROOT, "static")
+
+# Módulos da UI: cada um expõe PIPELINE_OPTIONS (provider, arquivos de resultado)
+STREAM_MODULES = ("main", "main_gpt")
+# --stub: pipeline offline para testes de carga (load_test.py), sem salvar resultados
+STUB_PIPELINE = {"provider_name": "stub", "key_loaded": "Provider stub (offline)", "results_path": None}
+
+HEARTBEAT_SECONDS = 15
+Z3_WORKERS = os.cpu_count() or 2
+
+
+class Z3Pool:
+    """
+    Bounded process pool for the CPU-bound Z3 step: at most `workers` puzzles
+    are solved at once, the others wait on the event loop (where a cancelled
+    request simply stops waiting).
+    """
+
+    def __init__(self, workers=Z3_WORKERS):
+        self.workers = workers
+        self._executor = None
+        self._slots = None
+
+    async def run(self, puzzle):
+        if self._executor is None:
+            # spawn: não herda as threads do servidor
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            self._slots = asyncio.Semaphore(self.workers)
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, z3_consequences, puzzle)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+def load_pipelines(stub=False, stub_latency=0.05):
+    """PIPELINE_OPTIONS of every UI module, imported once when the server starts."""
+    pipelines = {name: importlib.import_module(name).PIPELINE_OPTIONS for name in STREAM_MODULES}
+    if stub:
+        pipelines["stub"] = dict(STUB_PIPELINE, provider_options={"latency": stub_latency})
+    return pipelines
+
+
+async def _send_response(send, status, body, content_type="text/plain; charset=utf-8"):
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", content_type.encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+
+def _sse(text):
+    return f"data: {text}\n\n".encode("utf-8")
+
+
+class AsyncApp:
+    """
+    ASGI app with the same routes as app.py (/, /static, /stream). /stream
+    runs the pipeline on the event loop: LLM calls are awaited, Z3 goes to the
+    Z3Pool, idle streams get a heartbeat comment and a client disconnect (e.g.
+    the Stop button closing the EventSource) cancels the run.
+    """
+
+    def __init__(self, pipelines, z3_workers=Z3_WORKERS, heartbeat=HEARTBEAT_SECONDS):
+        self.pipelines = pipelines
+        self.z3 = Z3Pool(z3_workers)
+        self.heartbeat = heartbeat
+        self.active_streams = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        path = scope["path"]
+        if path == "/":
+            with open(os.path.join(ROOT, "templates", "index.html"), "rb") as f:
+                await _send_response(send, 200, f.read(), "text/html; charset=utf-8")
+        elif path.startswith("/static/"):
+            await self._static(path[len("/static/"):], send)
+        elif path == "/stream":
+            await self._stream(scope, receive, send)
+        else:
+            await _send_response(send, 404, b"Not Found")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.z3.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _static(self, name, send):
+        file_path = os.path.normpath(os.path.join(STATIC_DIR, name))
+        if not file_path.startswith(STATIC_DIR + os.sep) or not os.path.isfile(file_path):
+            await _send_response(send, 404, b"Not Found")
+            return
+        with open(file_path, "rb") as f:
+            body = f.read()
+        await _send_response(send, 200, body, mimetypes.guess_type(file_path)[0] or "application/octet-stream")
+
+    async def _stream(self, scope, receive, send):
+        query = parse_qs(scope["query_string"].decode("utf-8"))
+        module = query.get("module", ["main"])[0]
+        args = query.get("args", [""])[0]
+
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/event-stream; charset=utf-8"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),
+        ]})
+
+        options = self.pipelines.get(module)
+        if options is None:
+            await send({"type": "http.response.body", "more_body": True,
+                        "body": _sse(f"ERROR: módulo desconhecido: {module}")})
+            await send({"type": "http.response.body", "body": b"event: done\ndata: done\n\n"})
+            return
+
+        lines = asyncio.Queue()
+
+        async def produce():
+            try:
+                puzzle_arg, filtros = parse_selection(args)
+                for nome in await asyncio.to_thread(select_puzzles, puzzle_arg, **filtros):
+                    async for _, text in solver_events_async(puzzle_arg=nome, run_z3=self.z3.run, **options):
+                        for line in text.splitlines():
+                            await lines.put(line)
+            except Exception as e:
+                await lines.put(f"Erro: {e}")
+            finally:
+                await lines.put(None)
+
+        async def wait_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        self.active_streams += 1
+        producer = asyncio.create_task(produce())
+        disconnected = asyncio.create_task(wait_disconnect())
+        try:
+            while True:
+                next_line = asyncio.create_task(lines.get())
+                done, _ = await asyncio.wait({next_line, disconnected}, timeout=self.heartbeat,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if disconnected in done:
+                    # Cliente fechou a conexão: cancela LLM/Z3 pendentes
+                    next_line.cancel()
+                    return
+                if not done:
+                    next_line.cancel()
+                    await send({"type": "http.response.body", "body": b": ping\n\n", "more_body": True})
+                    continue
+                line = next_line.result()
+                if line is None:
+                    await send({"type": "http.response.body", "body": b"event: done\ndata: done\n\n"})
+                    return
+                await send({"type": "http.response.body", "body": _sse(line), "more_body": True})
+        finally:
+            self.active_streams -= 1
+            producer.cancel()
+            disconnected.cancel()
+
+
+def create_app(stub=False, stub_latency=0.05, z3_workers=Z3_WORKERS, heartbeat=HEARTBEAT_SECONDS):
+    return AsyncApp(load_pipelines(stub, stub_latency), z3_workers, heartbeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor assíncrono (ASGI) da interface web")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--z3-workers", type=int, default=Z3_WORKERS, help="Processos para o Z3")
+    parser.add_argument("--heartbeat", type=float, default=HEARTBEAT_SECONDS, help="Intervalo do keep-alive SSE (s)")
+    parser.add_argument("--stub", action="store_true", help="Habilita o módulo 'stub' (LLM offline) para testes de carga")
+    parser.add_argument("--stub-latency", type=float, default=0.05, help="Latência simulada do provider stub (s)")
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("O modo assíncrono precisa do uvicorn: pip install uvicorn")
+
+    app = create_app(args.stub, args.stub_latency, args.z3_workers, args.heartbeat)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", backlog=4096)
+
+
+if __name__ == '__main__':
+    main()
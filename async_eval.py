@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+from datetime import datetime
+from answer_cache import solve_cached
+from batch_solver import list_puzzle_files
+from packed_corpus import is_packed, open_packed
+from prompts import PROMPT_VARIANTS
+from save_results import normalize_answer, compare_results
+from providers import get_provider, PROVIDERS
+from llm_cache import ReplayMissError
+
+
+# ============================================================
+# 1. LIMITS
+# ============================================================
+
+class TokenBucket:
+    """Token-bucket rate limiter: at most `rate` acquisitions per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# ============================================================
+# 2. EVALUATION
+# ============================================================
+
+async def evaluate(puzzles, providers, variants=("sem_z3", "com_z3"), concurrency=8, rate=None,
+                   retries=3, backoff=0.5, output_path="resultados/eval_async.jsonl"):
+    """
+    Runs every puzzle x prompt variant x provider at once.
+    puzzles: list of (name, text); providers: see providers.get_provider.
+    Each provider gets its own concurrency limit and, if rate is set, a token
+    bucket of `rate` requests/s. Failed calls are retried with exponential
+    backoff; each result is appended to output_path as soon as it completes.
+    Returns the list of result rows.
+    """
+    dir_path = os.path.dirname(output_path) or "."
+    os.makedirs(dir_path, exist_ok=True)
+
+    # Gabarito (Z3, com cache) fora do event loop
+    gabarito = {}
+    for name, text in puzzles:
+        gabarito[name] = (await asyncio.to_thread(solve_cached, text))[1]
+
+    limits = {p.name: (asyncio.Semaphore(concurrency), TokenBucket(rate) if rate else None)
+              for p in providers}
+    rows = []
+
+    with open(output_path, "a", encoding="utf-8") as out:
+
+        async def run_one(provider, variant, name, text):
+            semaphore, bucket = limits[provider.name]
+            consequencias = gabarito[name]
+            row = {"puzzle": name, "provider": provider.name, "model": provider.model, "variant": variant}
+            start = time.perf_counter()
+            for attempt in range(retries + 1):
+                try:
+                    async with semaphore:
+                        if bucket:
+                            await bucket.acquire()
+                        resposta = await provider.agenerate(PROMPT_VARIANTS[variant](text))
+                    row["llm"] = normalize_answer(resposta, consequencias)
+                    row["match"] = compare_results(resposta, consequencias)
+                    break
+                except Exception as e:
+                    # Em modo replay uma resposta ausente não aparece tentando de novo
+                    if attempt == retries or isinstance(e, ReplayMissError):
+                        row["erro"] = str(e)
+                        row["match"] = False
+                        break
+                    await asyncio.sleep(backoff * 2 ** attempt + random.uniform(0, backoff))
+
+            row["z3_consequencias"] = consequencias
+            row["tentativas"] = attempt + 1
+            row["latencia"] = round(time.perf_counter() - start, 3)
+            row["timestamp"] = datetime.now().isoformat(timespec="seconds")
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            out.flush()
+            rows.append(row)
+
+        await asyncio.gather(*(
+            run_one(provider, variant, name, text)
+            for name, text in puzzles
+            for variant in variants
+            for provider in providers
+        ))
+
+    return rows
+
+
+def load_puzzles(source):
+    """Reads the puzzles of a folder/glob/file or packed corpus as a list of (file name, text)."""
+    if is_packed(source):
+        corpus = open_packed(source)
+        return [(corpus.label(i), corpus.text(i).strip()) for i in range(len(corpus))]
+    puzzles = []
+    for path in list_puzzle_files(source):
+        with open(path, "r", encoding="utf-8") as f:
+            puzzles.append((os.path.basename(path), f.read().strip()))
+    return puzzles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avalia vários puzzles em várias LLMs de forma concorrente")
+    parser.add_argument("source", nargs="?", default="puzzles", help="Pasta, padrão glob, arquivo .txt ou corpus .kkc")
+    parser.add_argument("--providers", default="gemini,openai", help=f"Lista separada por vírgula: {', '.join(PROVIDERS)}")
+    parser.add_argument("--variants", default=",".join(PROMPT_VARIANTS), help="Variantes de prompt (sem_z3, com_z3)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Chamadas simultâneas por provider")
+    parser.add_argument("--rps", type=float, default=None, help="Limite de requisições por segundo por provider")
+    parser.add_argument("--retries", type=int, default=3, help="Novas tentativas em caso de erro")
+    parser.add_argument("--output", default="resultados/eval_async.jsonl", help="Arquivo JSONL de saída")
+    parser.add_argument("--stub-latency", type=float, default=0.05, help="Latência simulada do provider stub (s)")
+    args = parser.parse_args()
+
+    providers = []
+    for name in args.providers.split(","):
+        options = {"latency": args.stub_latency} if name == "stub" else {}
+        providers.append(get_provider(name, **options))
+
+    puzzles = load_puzzles(args.source)
+    start = time.perf_counter()
+    rows = asyncio.run(evaluate(puzzles, providers, args.variants.split(","), args.concurrency,
+                                args.rps, args.retries, output_path=args.output))
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(rows)} avaliações em {elapsed:.2f}s")
+    for provider in providers:
+        for variant in args.variants.split(","):
+            grupo = [r for r in rows if r["provider"] == provider.name and r["variant"] == variant]
+            acertos = sum(r["match"] for r in grupo)
+            print(f"{provider.name} ({provider.model}) {variant}: {acertos}/{len(grupo)} acertos")
+    print(f"Resultados salvos em: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import solverz3
+import solverbits
+import solvergf2
+import puzzle_ir
+
+# Até este n a enumeração em NumPy é mais rápida que o Z3 (ver bench_backends.py)
+BITS_MAX_N = 16
+
+BACKENDS = {
+    "z3": (solverz3.build_z3, solverz3.generic_solver, solverz3.logical_consequences),
+    "bits": (solverbits.build_bits, solverbits.generic_solver, solverbits.logical_consequences),
+    "gf2": (solvergf2.build_gf2, solvergf2.generic_solver, solvergf2.logical_consequences),
+}
+
+
+def choose_backend(n, backend="auto"):
+    """Returns the backend name for a puzzle with n people ('auto' picks by n)."""
+    if backend != "auto":
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend} (use one of {', '.join(BACKENDS)} or auto)")
+        return backend
+    return "bits" if n <= BITS_MAX_N else "z3"
+
+
+def parse_puzzle(puzzle_text, backend="auto"):
+    """
+    Parses the puzzle once and builds it for the chosen backend.
+    Returns a tuple (backend_name, variables, restrictions).
+    """
+    ir = puzzle_ir.parse_puzzle(puzzle_text)
+    name = choose_backend(len(ir.names), backend)
+    variables, restrictions = BACKENDS[name][0](ir)
+    return name, variables, restrictions
+
+
+def solve_ir(ir, backend="auto"):
+    """
+    Solves an already parsed PuzzleIR on the chosen backend.
+    Returns a tuple (model, consequences): generic_solver and logical_consequences.
+    """
+    build, solver, consequences = BACKENDS[choose_backend(len(ir.names), backend)]
+    variables, restrictions = build(ir)
+    return solver(variables, restrictions), consequences(variables, restrictions)
+
+
+def puzzle_solution(puzzle_text, backend="auto"):
+    """generic_solver of the chosen backend, straight from the puzzle text."""
+    name, variables, restrictions = parse_puzzle(puzzle_text, backend)
+    return BACKENDS[name][1](variables, restrictions)
+
+
+def puzzle_consequences(puzzle_text, backend="auto", components=False):
+    """
+    logical_consequences of the chosen backend, straight from the puzzle text
+    (with components, solved per connected component: see component_consequences).
+    """
+    return ir_consequences(puzzle_ir.parse_puzzle(puzzle_text), backend, components)
+
+
+def ir_consequences(ir, backend="auto", components=False):
+    """logical_consequences of an already parsed PuzzleIR (e.g. from a packed corpus)."""
+    if components:
+        return component_consequences(ir, backend)
+    build, _, consequences = BACKENDS[choose_backend(len(ir.names), backend)]
+    return consequences(*build(ir))
+
+
+def _component_consequences(job):
+    name, ir = job
+    build, _, consequences = BACKENDS[name]
+    return consequences(*build(ir))
+
+
+def component_consequences(ir, backend="auto", pool=None):
+    """
+    logical_consequences of a parsed PuzzleIR solved one connected component at
+    a time (see puzzle_ir.connected_components), each on the backend chosen for
+    its own size, and merged in name order. With a multiprocessing pool the
+    components are solved in parallel. An inconsistent component makes the
+    whole puzzle inconsistent.
+    """
+    jobs = [(choose_backend(len(sub.names), backend), sub) for _, sub in puzzle_ir.connected_components(ir)]
+    if pool is not None and len(jobs) > 1:
+        results = pool.map(_component_consequences, jobs)
+    else:
+        results = map(_component_consequences, jobs)
+
+    merged = {}
+    for result in results:
+        if any(status.startswith("Inconsistente") for status in result.values()):
+            return {name: "Inconsistente (sem modelo possível)" for name in ir.names}
+        merged.update(result)
+    return {name: merged[name] for name in ir.names}
@@ -0,0 +1,128 @@
+import os
+import glob
+import json
+import time
+import argparse
+from multiprocessing import Pool, cpu_count
+from packed_corpus import is_packed, open_packed
+
+
+def list_puzzle_files(source):
+    """
+    Resolve the puzzle files of a batch.
+    source: a directory (e.g. 'puzzles/'), a glob pattern (e.g. 'puzzles/puzzle1*.txt')
+    or a single .txt file. Returns a sorted list of paths.
+    """
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, "*.txt")))
+    if os.path.isfile(source):
+        return [source]
+    return sorted(glob.glob(source, recursive=True))
+
+
+def _init_worker():
+    # Cada processo tem o seu próprio contexto Z3: o import acontece uma
+    # única vez por worker, e não uma vez por puzzle.
+    global puzzle_consequences, ir_consequences
+    from backends import puzzle_consequences, ir_consequences
+
+
+def _solve_file(job):
+    """Solve one puzzle file inside a worker and return its answer-key row."""
+    path, backend, components = job
+    row = {"puzzle": os.path.basename(path), "path": path}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            puzzle_text = f.read().strip()
+        consequencias = puzzle_consequences(puzzle_text, backend, components)
+        row["n"] = len(consequencias)
+        row["backend"] = backend
+        row["z3_consequencias"] = consequencias
+    except Exception as e:
+        row["erro"] = str(e)
+    return row
+
+
+def _solve_packed(job):
+    """Solve puzzle i of a packed corpus inside a worker (the IR is read from the mmap, no parsing)."""
+    path, i, backend, components = job
+    corpus = open_packed(path)
+    row = {"puzzle": corpus.label(i), "path": f"{path}#{i}"}
+    try:
+        consequencias = ir_consequences(corpus.ir(i), backend, components)
+        row["n"] = len(consequencias)
+        row["backend"] = backend
+        row["z3_consequencias"] = consequencias
+    except Exception as e:
+        row["erro"] = str(e)
+    return row
+
+
+def solve_batch(source, output_path="resultados/answer_key.jsonl", workers=None, chunksize=16,
+                backend="z3", components=False):
+    """
+    Solve every puzzle in source (see list_puzzle_files, or a packed .kkc corpus)
+    on a process pool and stream one JSON line per puzzle to output_path as soon
+    as it is solved (order is not preserved).
+    backend: 'z3', 'bits', 'gf2' or 'auto' (see backends.choose_backend); each row
+    records it, since the answers are only Z3's when backend is 'z3'.
+    components: solve each connected component of a puzzle on its own.
+    Returns a dict with the totals and the throughput in puzzles/s.
+    """
+    if is_packed(source):
+        solve, jobs = _solve_packed, [(source, i, backend, components) for i in range(len(open_packed(source)))]
+    else:
+        solve, jobs = _solve_file, [(p, backend, components) for p in list_puzzle_files(source)]
+    workers = workers or cpu_count()
+
+    dir_path = os.path.dirname(output_path) or "."
+    os.makedirs(dir_path, exist_ok=True)
+
+    solved = errors = 0
+    start = time.perf_counter()
+    with open(output_path, "w", encoding="utf-8") as out, \
+            Pool(processes=workers, initializer=_init_worker) as pool:
+        for row in pool.imap_unordered(solve, jobs, chunksize=chunksize):
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            if "erro" in row:
+                errors += 1
+            else:
+                solved += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        "puzzles": len(jobs),
+        "resolvidos": solved,
+        "erros": errors,
+        "workers": workers,
+        "segundos": elapsed,
+        "puzzles_por_segundo": len(jobs) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera o gabarito (Z3) de vários puzzles em paralelo")
+    parser.add_argument("source", nargs="?", default="puzzles",
+                        help="Pasta, padrão glob, arquivo .txt ou corpus .kkc (padrão: puzzles)")
+    parser.add_argument("-o", "--output", default="resultados/answer_key.jsonl",
+                        help="Arquivo JSONL de saída")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="Número de processos (padrão: número de núcleos)")
+    parser.add_argument("--chunksize", type=int, default=16,
+                        help="Puzzles enviados a cada worker por vez")
+    parser.add_argument("--backend", choices=["auto", "z3", "bits", "gf2"], default="z3",
+                        help="Backend de resolução (padrão: z3; auto escolhe por n)")
+    parser.add_argument("--components", action="store_true",
+                        help="Resolve separadamente cada grupo de pessoas que não se referenciam")
+    args = parser.parse_args()
+
+    stats = solve_batch(args.source, args.output, args.workers, args.chunksize, args.backend,
+                        args.components)
+    print(f"{stats['resolvidos']} puzzles resolvidos, {stats['erros']} erros "
+          f"em {stats['segundos']:.2f}s com {stats['workers']} workers "
+          f"({stats['puzzles_por_segundo']:.1f} puzzles/s)")
+    print(f"Gabarito salvo em: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
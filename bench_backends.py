@@ -0,0 +1,41 @@
+import time
+import argparse
+from puzzle import generate_generic_puzzle
+from backends import puzzle_consequences, BITS_MAX_N
+from puzzle_ir import parse_puzzle
+
+
+def time_backend(puzzles, backend):
+    """Average seconds per puzzle of parse + logical_consequences on one backend."""
+    # Cache do parser vazio: cada backend paga o próprio parse, não só o primeiro medido
+    parse_puzzle.cache_clear()
+    start = time.perf_counter()
+    for text in puzzles:
+        puzzle_consequences(text, backend)
+    return (time.perf_counter() - start) / len(puzzles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara os backends Z3, bitset e GF(2) por número de pessoas")
+    parser.add_argument("--min-n", type=int, default=3)
+    parser.add_argument("--max-n", type=int, default=22)
+    parser.add_argument("--puzzles", type=int, default=20, help="Puzzles gerados por valor de n")
+    args = parser.parse_args()
+
+    print(f"{'n':>3} {'z3 (ms)':>10} {'bits (ms)':>10} {'gf2 (ms)':>10}  bits x z3")
+    crossover = None
+    for n in range(args.min_n, args.max_n + 1):
+        puzzles = [generate_generic_puzzle(n) for _ in range(args.puzzles)]
+        z3_time = time_backend(puzzles, "z3")
+        bits_time = time_backend(puzzles, "bits")
+        gf2_time = time_backend(puzzles, "gf2")
+        faster = "bits" if bits_time < z3_time else "z3"
+        if faster == "z3" and crossover is None:
+            crossover = n
+        print(f"{n:>3} {z3_time * 1000:>10.2f} {bits_time * 1000:>10.2f} {gf2_time * 1000:>10.2f}  {faster}")
+
+    print(f"\nCruzamento medido: n = {crossover} | BITS_MAX_N atual: {BITS_MAX_N}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+import time
+import argparse
+from puzzle import generate_generic_puzzle
+from puzzle_ir import parse_puzzle
+
+
+def build_corpus(lines, n, distinct=200):
+    """Tiles `distinct` generated puzzles with n people until the corpus has `lines` statements."""
+    base = [generate_generic_puzzle(n) for _ in range(distinct)]
+    return [base[i % distinct] for i in range(max(1, lines // n))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede a vazão do parser de puzzles (linhas/s)")
+    parser.add_argument("--lines", type=int, default=1_000_000, help="Total de falas no corpus")
+    parser.add_argument("--n", type=int, default=8, help="Pessoas (falas) por puzzle")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.lines, args.n)
+    total_lines = len(corpus) * args.n
+    print(f"Corpus: {len(corpus)} puzzles, {total_lines} falas")
+
+    # Sem cache: toda chamada passa pela regex
+    start = time.perf_counter()
+    for text in corpus:
+        parse_puzzle.__wrapped__(text)
+    elapsed = time.perf_counter() - start
+    print(f"Sem cache: {elapsed:.2f}s ({total_lines / elapsed:,.0f} falas/s)")
+
+    # Com cache: textos repetidos reaproveitam o IR já montado
+    parse_puzzle.cache_clear()
+    start = time.perf_counter()
+    for text in corpus:
+        parse_puzzle(text)
+    elapsed = time.perf_counter() - start
+    print(f"Com cache: {elapsed:.2f}s ({total_lines / elapsed:,.0f} falas/s)")
+
+
+if __name__ == '__main__':
+    main()
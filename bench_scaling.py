@@ -0,0 +1,35 @@
+import time
+import argparse
+from puzzle import generate_generic_puzzle
+from solverz3 import parse_puzzle_to_z3, generic_solver, logical_consequences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede como o Z3 escala com o número de habitantes")
+    parser.add_argument("--sizes", default="100,1000,10000",
+                        help="Valores de n separados por vírgula (ex: 1000,10000,100000)")
+    parser.add_argument("--prefix", default=None, help="Prefixo dos nomes (ex: P); padrão: A..Z, AA..ZZ, ...")
+    parser.add_argument("--no-consequences", action="store_true",
+                        help="Mede apenas geração, parse e generic_solver")
+    args = parser.parse_args()
+
+    print(f"{'n':>8} {'gerar (s)':>10} {'parse (s)':>10} {'solver (s)':>11} {'consequências (s)':>18}")
+    for n in (int(x) for x in args.sizes.split(",")):
+        start = time.perf_counter()
+        text = generate_generic_puzzle(n, args.prefix)
+        generated = time.perf_counter()
+        variables, restrictions = parse_puzzle_to_z3(text)
+        parsed = time.perf_counter()
+        generic_solver(variables, restrictions)
+        solved = time.perf_counter()
+        consequences = "-"
+        if not args.no_consequences:
+            logical_consequences(variables, restrictions)
+            consequences = f"{time.perf_counter() - solved:.3f}"
+
+        print(f"{n:>8} {generated - start:>10.3f} {parsed - generated:>10.3f} "
+              f"{solved - parsed:>11.3f} {consequences:>18}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import puzzle_ir
+from backends import BACKENDS
+from puzzle import generate_generic_puzzle, FORM_MIXES
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PHASES = ("parse", "solve", "backbone")
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _stats(values):
+    return {"p50": float(np.percentile(values, 50)), "p95": float(np.percentile(values, 95)),
+            "media": float(np.mean(values))}
+
+
+def run_family(n, mix, density, samples, seed, backend):
+    """
+    Times `samples` seeded puzzles of one family (n, mix, density): parse
+    (text -> IR -> solver input, without the parse cache), solve (generic_solver)
+    and backbone (logical_consequences), each measured separately.
+    """
+    build, generic_solver, logical_consequences = BACKENDS[backend]
+    # Semente por família: a mesma família gera os mesmos puzzles em qualquer execução
+    rng = random.Random(f"{seed}-{n}-{mix}-{density}")
+    times = {phase: [] for phase in PHASES}
+    for _ in range(samples):
+        text = generate_generic_puzzle(n, forms=FORM_MIXES[mix], density=density, rng=rng)
+
+        start = time.perf_counter()
+        variables, restrictions = build(puzzle_ir.parse_puzzle.__wrapped__(text))
+        parsed = time.perf_counter()
+        generic_solver(variables, restrictions)
+        solved = time.perf_counter()
+        logical_consequences(variables, restrictions)
+        done = time.perf_counter()
+
+        times["parse"].append(parsed - start)
+        times["solve"].append(solved - parsed)
+        times["backbone"].append(done - solved)
+
+    total = sum(sum(t) for t in times.values())
+    result = {"n": n, "mix": mix, "densidade": density, "amostras": samples}
+    result.update({phase: _stats(times[phase]) for phase in PHASES})
+    result["puzzles_por_segundo"] = samples / total if total else None
+    result["pico_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def run_suite(sizes, mixes, densities, samples=10, seed=0, backend="z3", isolate=True):
+    """
+    Runs every family and returns the report dict. With isolate, each family
+    runs in a fresh process so its peak RSS is its own.
+    """
+    familias = []
+    for n in sizes:
+        for mix in mixes:
+            for density in densities:
+                args = (n, mix, density, samples, seed, backend)
+                try:
+                    if isolate:
+                        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as ex:
+                            result = ex.submit(run_family, *args).result()
+                    else:
+                        result = run_family(*args)
+                except ValueError as e:
+                    # Ex.: mistura "pares" com poucas pessoas
+                    result = {"n": n, "mix": mix, "densidade": density, "erro": str(e)}
+                familias.append(result)
+                _print_family(result)
+    return {
+        "meta": {"seed": seed, "backend": backend, "amostras": samples, "python": platform.python_version(),
+                 "plataforma": platform.platform(), "timestamp": datetime.now().isoformat(timespec="seconds")},
+        "familias": familias,
+    }
+
+
+def _family_key(result):
+    return result["n"], result["mix"], result["densidade"]
+
+
+def compare(report, baseline, tolerance=0.2):
+    """
+    p50 ratios (current / baseline) per family and phase. Returns a list of
+    (family, phase, ratio, regressed) with regressed = ratio > 1 + tolerance.
+    """
+    base = {_family_key(r): r for r in baseline["familias"] if "erro" not in r}
+    rows = []
+    for result in report["familias"]:
+        old = base.get(_family_key(result))
+        if old is None or "erro" in result:
+            continue
+        for phase in PHASES:
+            before, now = old[phase]["p50"], result[phase]["p50"]
+            ratio = now / before if before else float("inf")
+            rows.append((_family_key(result), phase, ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def _print_family(result):
+    label = f"n={result['n']:<6} mix={result['mix']:<8} dens={result['densidade']}"
+    if "erro" in result:
+        print(f"{label}  erro: {result['erro']}")
+        return
+    phases = "  ".join(f"{p} p50 {result[p]['p50'] * 1000:8.2f} ms p95 {result[p]['p95'] * 1000:8.2f} ms"
+                       for p in PHASES)
+    print(f"{label}  {phases}  {result['puzzles_por_segundo']:8.1f} puzzles/s  rss {result['pico_rss_mb']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reproduzível do caminho de resolução (parse, solver, backbone)")
+    parser.add_argument("--sizes", default="10,100,1000", help="Valores de n separados por vírgula")
+    parser.add_argument("--mixes", default=",".join(FORM_MIXES), help=f"Misturas de afirmações: {', '.join(FORM_MIXES)}")
+    parser.add_argument("--densities", default="1,2", help="Afirmações por pessoa, separadas por vírgula")
+    parser.add_argument("--samples", type=int, default=10, help="Puzzles por família")
+    parser.add_argument("--seed", type=int, default=0, help="Semente mestre")
+    parser.add_argument("--backend", default="z3", choices=list(BACKENDS), help="Backend de resolução")
+    parser.add_argument("--no-isolate", action="store_true", help="Roda todas as famílias neste processo")
+    parser.add_argument("--output", default="resultados/bench.json", help="Relatório JSON de saída")
+    parser.add_argument("--baseline", help="Relatório JSON anterior para comparação")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Piora tolerada no p50 (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    report = run_suite([int(x) for x in args.sizes.split(",")], args.mixes.split(","),
+                       [int(x) for x in args.densities.split(",")], args.samples, args.seed,
+                       args.backend, isolate=not args.no_isolate)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Relatório salvo em: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.tolerance)
+        for (n, mix, density), phase, ratio, regressed in rows:
+            flag = "  <-- REGRESSÃO" if regressed else ""
+            print(f"n={n:<6} mix={mix:<8} dens={density} {phase:<8} {ratio:6.2f}x{flag}")
+        if any(r[3] for r in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
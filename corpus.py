@@ -0,0 +1,119 @@
+import os
+import time
+import random
+import argparse
+from multiprocessing import Pool, cpu_count
+from puzzle import (sample_puzzle_ir, sample_targeted_ir, render_puzzle, reserve_puzzle_numbers, parse_require,
+                    FORM_MIXES)
+from packed_corpus import PackedWriter
+
+
+def shard_rng(seed, shard):
+    """Independent, reproducible random stream of one shard, derived from the master seed."""
+    return random.Random(f"{seed}-shard{shard}")
+
+
+def _shard_irs(n, count, seed, shard, mix, density, prefix, target):
+    rng = shard_rng(seed, shard)
+    for _ in range(count):
+        if target:
+            yield sample_targeted_ir(n, prefix=prefix, forms=FORM_MIXES[mix], rng=rng, **target)
+        else:
+            yield sample_puzzle_ir(n, prefix, FORM_MIXES[mix], density, rng)
+
+
+def _write_shard(job):
+    """Generates one shard inside a worker and writes it under its reserved numbers."""
+    out, first, shard, count, n, seed, mix, density, prefix, target = job
+    for i, ir in enumerate(_shard_irs(n, count, seed, shard, mix, density, prefix, target)):
+        with open(os.path.join(out, f"puzzle{first + i}.txt"), 'w', encoding='utf-8') as f:
+            f.write(render_puzzle(ir))
+    return count
+
+
+def _pack_shard(job):
+    """Generates one shard inside a worker and returns its IRs (the parent writes the corpus)."""
+    _, _, shard, count, n, seed, mix, density, prefix, target = job
+    return list(_shard_irs(n, count, seed, shard, mix, density, prefix, target))
+
+
+def build_corpus(out, count, n, seed=0, workers=None, shard_size=1000, mix="todas", density=1,
+                 prefix=None, target=None, packed=None):
+    """
+    Generates count puzzles with n people into out on a process pool.
+
+    The numbers are reserved once (see puzzle.reserve_puzzle_numbers) and split
+    into shards of shard_size; shard k draws from shard_rng(seed, k) and writes
+    its own range, so the corpus depends only on the seed and shard_size, not on
+    the number of workers or the order in which shards finish. target: keyword
+    arguments of puzzle.sample_targeted_ir (unique, determined, require) for a
+    corpus with a given profile (density is then not used). packed: path of a
+    packed corpus (.kkc, see packed_corpus) to write instead of .txt files;
+    its puzzles are labelled puzzle1.txt, puzzle2.txt, ...
+    Returns a dict with the first number, the totals and the throughput.
+    """
+    workers = workers or cpu_count()
+    first = 1 if packed else reserve_puzzle_numbers(out, count)
+    jobs = [(out, first + start, shard, min(shard_size, count - start), n, seed, mix, density, prefix, target)
+            for shard, start in enumerate(range(0, count, shard_size))]
+
+    written = 0
+    start = time.perf_counter()
+    with Pool(processes=workers) as pool:
+        if packed:
+            # imap em ordem: os shards entram no arquivo na ordem dos números
+            with PackedWriter(packed) as writer:
+                for (_, shard_first, *_), irs in zip(jobs, pool.imap(_pack_shard, jobs)):
+                    for i, ir in enumerate(irs):
+                        writer.add(ir, f"puzzle{shard_first + i}.txt")
+                    written += len(irs)
+        else:
+            for shard_count in pool.imap_unordered(_write_shard, jobs):
+                written += shard_count
+    elapsed = time.perf_counter() - start
+
+    return {
+        "primeiro": first,
+        "puzzles": written,
+        "shards": len(jobs),
+        "workers": workers,
+        "segundos": elapsed,
+        "puzzles_por_segundo": written / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um corpus reproduzível de puzzles em paralelo")
+    parser.add_argument("-n", type=int, default=3, help="Número de pessoas (padrão: 3)")
+    parser.add_argument("--count", type=int, default=1000, help="Quantidade de puzzles")
+    parser.add_argument("--out", default="puzzles", help="Pasta de saída (padrão: puzzles)")
+    parser.add_argument("--packed", default=None, metavar="ARQUIVO",
+                        help="Grava um corpus compactado (.kkc) em vez de arquivos .txt")
+    parser.add_argument("--seed", type=int, default=0, help="Semente mestre")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="Número de processos (padrão: número de núcleos)")
+    parser.add_argument("--shard-size", type=int, default=1000, help="Puzzles por shard")
+    parser.add_argument("--mix", default="todas", choices=list(FORM_MIXES), help="Mistura de afirmações")
+    parser.add_argument("--density", type=int, default=1, help="Afirmações por pessoa")
+    parser.add_argument("--prefix", default=None,
+                        help="Prefixo dos nomes (ex: P gera P1..Pn); padrão: A..Z, AA..ZZ, ...")
+    parser.add_argument("--unique", action="store_true", help="Só puzzles com solução única")
+    parser.add_argument("--determined", type=int, default=None,
+                        help="Exatamente K pessoas determinadas (as demais indeterminadas)")
+    parser.add_argument("--require", default=None,
+                        help="Quantidade mínima por tipo de afirmação, ex: sao_iguais=2,patife=1")
+    args = parser.parse_args()
+
+    target = {}
+    if args.unique or args.determined is not None or args.require:
+        target = {"unique": args.unique, "determined": args.determined, "require": parse_require(args.require)}
+    stats = build_corpus(args.out, args.count, args.n, args.seed, args.workers, args.shard_size,
+                         args.mix, args.density, args.prefix, target, args.packed)
+    ultimo = stats["primeiro"] + stats["puzzles"] - 1
+    print(f"{stats['puzzles']} puzzles (puzzle{stats['primeiro']}..puzzle{ultimo}) em {stats['shards']} shards, "
+          f"{stats['segundos']:.2f}s com {stats['workers']} workers ({stats['puzzles_por_segundo']:.0f} puzzles/s)")
+    print(f"Corpus salvo em: {args.packed or args.out}")
+
+
+if __name__ == '__main__':
+    main()
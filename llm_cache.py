@@ -0,0 +1,186 @@
+import os
+import json
+import asyncio
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from sqlite_lru import evict_lru
+
+DEFAULT_LLM_CACHE_PATH = "resultados/llm_cache.sqlite"
+
+# on: consulta o cache e grava as respostas novas | off: sempre chama a API |
+# replay: só lê do cache, nunca usa a rede (erro se a resposta não estiver lá)
+CACHE_MODES = ("on", "off", "replay")
+
+
+class ReplayMissError(LookupError):
+    """A replay-only run asked for a completion that is not in the cache."""
+
+
+def cache_mode():
+    """Cache mode from the LLM_CACHE environment variable (default: on)."""
+    mode = os.getenv("LLM_CACHE", "on").strip().lower()
+    if mode not in CACHE_MODES:
+        raise ValueError(f"LLM_CACHE inválido: {mode} (use um de: {', '.join(CACHE_MODES)})")
+    return mode
+
+
+def response_key(provider, model, prompt, params):
+    """Cache key of a completion: provider, model, prompt hash and sampling params."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    payload = json.dumps([provider, model, prompt_hash, params], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk (SQLite) cache of LLM completions with TTL expiry (ttl seconds,
+    None = never) and LRU eviction beyond max_entries (see sqlite_lru).
+    """
+
+    def __init__(self, path=DEFAULT_LLM_CACHE_PATH, ttl=None, max_entries=50_000):
+        dir_path = os.path.dirname(path) or "."
+        os.makedirs(dir_path, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, provider TEXT, model TEXT, response TEXT,"
+                " created REAL, last_used REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get(self, key):
+        """Cached response text, or None on a miss (expired entries count as misses)."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            with self._db:
+                if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._count -= 1
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, provider, model, response):
+        now = time.time()
+        with self._lock, self._db:
+            new = self._db.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone() is None
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                             (key, provider, model, response, now, now))
+            self._count += new
+            if self._count > self.max_entries:
+                self._count = evict_lru(self._db, "responses", self.max_entries)
+
+    def evict_expired(self):
+        """Deletes every entry older than the TTL; returns how many were removed."""
+        if self.ttl is None:
+            return 0
+        with self._lock, self._db:
+            removed = self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)).rowcount
+            self._count -= removed
+            return removed
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM responses")
+            self._count = 0
+
+    def stats(self):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT provider, model, COUNT(*) FROM responses GROUP BY provider, model").fetchall()
+        return {"entradas": {f"{p}/{m}": c for p, m, c in rows}, "hits": self.hits, "misses": self.misses}
+
+
+_default_cache = None
+
+
+def default_cache():
+    """
+    Process-wide response cache. LLM_CACHE_PATH, LLM_CACHE_TTL (seconds) and
+    LLM_CACHE_MAX override the path, the TTL and the size bound.
+    """
+    global _default_cache
+    if _default_cache is None:
+        ttl = os.getenv("LLM_CACHE_TTL")
+        _default_cache = ResponseCache(
+            os.getenv("LLM_CACHE_PATH", DEFAULT_LLM_CACHE_PATH),
+            ttl=float(ttl) if ttl else None,
+            max_entries=int(os.getenv("LLM_CACHE_MAX", "50000")),
+        )
+    return _default_cache
+
+
+class CachedProvider:
+    """
+    Wraps a provider (see providers.py) with the response cache. In replay mode
+    a miss raises ReplayMissError instead of calling the API.
+    """
+
+    def __init__(self, provider, cache=None, mode=None):
+        self.provider = provider
+        self.cache = cache or default_cache()
+        self.mode = mode or cache_mode()
+        self.name = provider.name
+        self.model = provider.model
+
+    def _key(self, prompt):
+        return response_key(self.provider.name, self.provider.model, prompt, self.provider.params)
+
+    def _lookup(self, key):
+        response = self.cache.get(key)
+        if response is None and self.mode == "replay":
+            raise ReplayMissError(f"Resposta de {self.name}/{self.model} não está no cache (LLM_CACHE=replay)")
+        return response
+
+    def generate(self, prompt):
+        key = self._key(prompt)
+        response = self._lookup(key)
+        if response is None:
+            response = self.provider.generate(prompt)
+            self.cache.put(key, self.name, self.model, response)
+        return response
+
+    async def agenerate(self, prompt):
+        # SQLite é bloqueante: consulta e gravação rodam fora do event loop
+        key = self._key(prompt)
+        response = await asyncio.to_thread(self._lookup, key)
+        if response is None:
+            response = await self.provider.agenerate(prompt)
+            await asyncio.to_thread(self.cache.put, key, self.name, self.model, response)
+        return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerencia o cache de respostas das LLMs")
+    parser.add_argument("--stats", action="store_true", help="Mostra quantas respostas há por provider/modelo")
+    parser.add_argument("--evict", action="store_true", help="Remove as entradas expiradas (LLM_CACHE_TTL)")
+    parser.add_argument("--clear", action="store_true", help="Apaga todo o cache")
+    args = parser.parse_args()
+
+    cache = default_cache()
+    if args.clear:
+        cache.clear()
+        print("Cache apagado.")
+    if args.evict:
+        print(f"{cache.evict_expired()} entradas expiradas removidas.")
+    if args.stats or not (args.clear or args.evict):
+        for chave, total in cache.stats()["entradas"].items():
+            print(f"{chave}: {total}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+import subprocess
+from urllib.parse import urlencode
+
+
+async def open_stream(host, port, path, timeout):
+    """One SSE client: returns (time to first data line, total time) or raises on failure."""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n"
+                     f"Connection: close\r\n\r\n".encode())
+        await writer.drain()
+        ttfb = None
+        while True:
+            line = await asyncio.wait_for(reader.readline(), timeout)
+            if not line:
+                raise ConnectionError("conexão encerrada antes do evento done")
+            if ttfb is None and line.startswith(b"data:"):
+                ttfb = time.perf_counter() - start
+            if line.startswith(b"event: done"):
+                return ttfb, time.perf_counter() - start
+    finally:
+        writer.close()
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def run_load(host, port, path, streams, timeout):
+    start = time.perf_counter()
+    results = await asyncio.gather(*(open_stream(host, port, path, timeout) for _ in range(streams)),
+                                   return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    ok = [r for r in results if not isinstance(r, BaseException)]
+    erros = [r for r in results if isinstance(r, BaseException)]
+    return ok, erros, elapsed
+
+
+async def wait_port(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do /stream (SSE) com muitas conexões simultâneas")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--streams", type=int, default=300, help="Conexões SSE simultâneas")
+    parser.add_argument("--module", default="stub", help="Módulo do /stream (stub = LLM offline)")
+    parser.add_argument("--args", default="puzzle1", help="Args do puzzle enviados ao /stream")
+    parser.add_argument("--timeout", type=float, default=60, help="Tempo máximo sem dados por conexão (s)")
+    parser.add_argument("--spawn", action="store_true", help="Sobe 'app_async.py --stub' nesta porta durante o teste")
+    parser.add_argument("--stub-latency", type=float, default=1.0, help="Latência do stub ao usar --spawn (s)")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen([sys.executable, "app_async.py", "--stub", "--port", str(args.port),
+                                   "--stub-latency", str(args.stub_latency)])
+    try:
+        asyncio.run(wait_port(args.host, args.port))
+        path = "/stream?" + urlencode({"module": args.module, "args": args.args})
+        ok, erros, elapsed = asyncio.run(run_load(args.host, args.port, path, args.streams, args.timeout))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"{len(ok)}/{args.streams} streams concluídos em {elapsed:.2f}s ({len(erros)} erros)")
+    if ok:
+        ttfb = [r[0] for r in ok if r[0] is not None]
+        total = [r[1] for r in ok]
+        print(f"primeiro byte: p50 {statistics.median(ttfb) * 1000:.1f} ms | p95 {_percentile(ttfb, 0.95) * 1000:.1f} ms")
+        print(f"stream completo: p50 {statistics.median(total):.2f}s | p95 {_percentile(total, 0.95):.2f}s")
+    for erro in erros[:5]:
+        print(f"Erro: {erro!r}")
+
+
+if __name__ == '__main__':
+    main()
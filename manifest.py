@@ -0,0 +1,269 @@
+import os
+import json
+import random
+import sqlite3
+import argparse
+import threading
+from puzzle_ir import parse_puzzle, OPS, PARSER_VERSION
+from solvergf2 import build_gf2, solve_gf2
+from packed_corpus import is_packed, open_packed, content_hash
+
+DEFAULT_MANIFEST_PATH = "resultados/manifest.sqlite"
+# Bump when the stored metadata changes meaning (the manifest is then rebuilt)
+MANIFEST_VERSION = f"parser{PARSER_VERSION}-1"
+
+# Classe do veredito: solução única, pessoas indeterminadas ou sem solução
+CLASSES = ("unique", "undetermined", "inconsistent")
+# Arquivos que não são puzzles válidos (ficam no manifesto para não serem relidos)
+INVALID = "invalid"
+
+
+def verdict_class(ir):
+    """Verdict class of a puzzle (see CLASSES), from the GF(2) solver: one elimination, no SAT calls."""
+    solution = solve_gf2(*build_gf2(ir))
+    if not solution.consistent:
+        return "inconsistent"
+    return "unique" if solution.free == 0 else "undetermined"
+
+
+def describe(ir):
+    """(n, class, content hash, statement-type histogram) of a parsed puzzle."""
+    histogram = {}
+    for _, op, _, _ in ir.statements:
+        histogram[OPS[op]] = histogram.get(OPS[op], 0) + 1
+    return len(ir.names), verdict_class(ir), content_hash(ir).hex(), histogram
+
+
+class Manifest:
+    """
+    Per-puzzle metadata of a puzzle source (folder of .txt or packed corpus),
+    kept in SQLite: n, verdict class, content hash and statement histogram.
+
+    refresh() compares every file's mtime with the stored one and re-reads
+    only the changed files (and drops the removed ones), so puzzles edited in
+    place are re-classified; a packed corpus is skipped while its own mtime is
+    unchanged and re-read from a fresh mapping when it changes. Within
+    each (n, class) group the puzzles hold dense slots 0..total-1, so a
+    random pick is a group total plus one indexed lookup, whatever the size
+    of the corpus.
+    """
+
+    def __init__(self, source="puzzles", path=DEFAULT_MANIFEST_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.source = source
+        self._key = os.path.abspath(source)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS sources (source TEXT PRIMARY KEY, mtime_ns INTEGER, version TEXT);"
+            "CREATE TABLE IF NOT EXISTS puzzles (source TEXT, arquivo TEXT, mtime_ns INTEGER, n INTEGER,"
+            " classe TEXT, hash TEXT, hist TEXT, slot INTEGER, PRIMARY KEY (source, arquivo));"
+            "CREATE UNIQUE INDEX IF NOT EXISTS puzzles_slot ON puzzles (source, n, classe, slot);"
+            "CREATE TABLE IF NOT EXISTS groups (source TEXT, n INTEGER, classe TEXT, total INTEGER,"
+            " PRIMARY KEY (source, n, classe));"
+        )
+
+    # ------------------------------------------------------------
+    # Atualização incremental
+    # ------------------------------------------------------------
+
+    def _scan(self):
+        """{file name: (mtime_ns, hash or None, loader)} of the current source, without reading the files."""
+        if is_packed(self.source):
+            corpus = open_packed(self.source)
+            mtime = os.stat(self.source).st_mtime_ns
+            hashes = corpus.index["hash"]
+            return {corpus.label(i): (mtime, hashes[i].hex(), lambda i=i: corpus.ir(i))
+                    for i in range(len(corpus))}
+
+        def load(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return parse_puzzle.__wrapped__(f.read().strip())
+
+        with os.scandir(self.source) as entries:
+            return {e.name: (e.stat().st_mtime_ns, None, lambda path=e.path: load(path))
+                    for e in entries if e.name.endswith(".txt") and e.is_file()}
+
+    def refresh(self, force=False):
+        """
+        Brings the manifest up to date with the source; returns (updated, removed).
+        force: re-scan a packed corpus even if its mtime is unchanged.
+        """
+        mtime = os.stat(self.source).st_mtime_ns
+        with self._lock:
+            # BEGIN IMMEDIATE: um processo por vez atualiza o manifesto
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT mtime_ns, version FROM sources WHERE source = ?",
+                                       (self._key,)).fetchone()
+                if row and row[1] != MANIFEST_VERSION:
+                    self._clear()
+                elif row and row[0] == mtime and not force and is_packed(self.source):
+                    # Um corpus .kkc só muda regravado (mtime novo); numa pasta, um
+                    # arquivo editado no lugar não muda o mtime da pasta
+                    self._db.execute("COMMIT")
+                    return 0, 0
+                updated, removed = self._apply(self._scan())
+                self._db.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?)",
+                                 (self._key, mtime, MANIFEST_VERSION))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return updated, removed
+
+    def _clear(self):
+        for table in ("puzzles", "groups"):
+            self._db.execute(f"DELETE FROM {table} WHERE source = ?", (self._key,))
+
+    def _apply(self, current):
+        db = self._db
+        known = dict(db.execute("SELECT arquivo, mtime_ns FROM puzzles WHERE source = ?", (self._key,)))
+        totals = {(n, classe): total for n, classe, total in
+                  db.execute("SELECT n, classe, total FROM groups WHERE source = ?", (self._key,))}
+        changed = [name for name, (mtime, _, _) in current.items() if known.get(name) != mtime]
+        gone = [name for name in known if name not in current]
+
+        for name in changed:
+            mtime, new_hash, load = current[name]
+            if name in known:
+                old_hash = db.execute("SELECT hash FROM puzzles WHERE source = ? AND arquivo = ?",
+                                      (self._key, name)).fetchone()[0]
+                if new_hash is not None and new_hash == old_hash:
+                    # Corpus regravado com o mesmo conteúdo: só o mtime muda
+                    db.execute("UPDATE puzzles SET mtime_ns = ? WHERE source = ? AND arquivo = ?",
+                               (mtime, self._key, name))
+                    continue
+                self._remove(name, totals)
+            try:
+                n, classe, digest, histogram = describe(load())
+            except (OSError, ValueError):
+                n, classe, digest, histogram = 0, INVALID, None, {}
+            slot = totals.get((n, classe), 0)
+            totals[(n, classe)] = slot + 1
+            db.execute("INSERT INTO puzzles VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                       (self._key, name, mtime, n, classe, digest, json.dumps(histogram), slot))
+        for name in gone:
+            self._remove(name, totals)
+
+        db.execute("DELETE FROM groups WHERE source = ?", (self._key,))
+        db.executemany("INSERT INTO groups VALUES (?, ?, ?, ?)",
+                       [(self._key, n, classe, total) for (n, classe), total in totals.items() if total])
+        return len(changed), len(gone)
+
+    def _remove(self, name, totals):
+        """Deletes one puzzle and moves the last one of its group into the freed slot."""
+        n, classe, slot = self._db.execute("SELECT n, classe, slot FROM puzzles WHERE source = ? AND arquivo = ?",
+                                           (self._key, name)).fetchone()
+        self._db.execute("DELETE FROM puzzles WHERE source = ? AND arquivo = ?", (self._key, name))
+        last = totals[(n, classe)] - 1
+        if slot != last:
+            self._db.execute("UPDATE puzzles SET slot = ? WHERE source = ? AND n = ? AND classe = ? AND slot = ?",
+                             (slot, self._key, n, classe, last))
+        totals[(n, classe)] = last
+
+    # ------------------------------------------------------------
+    # Consultas (não abrem os arquivos dos puzzles)
+    # ------------------------------------------------------------
+
+    def _groups(self, n=None, classe=None):
+        query = "SELECT n, classe, total FROM groups WHERE source = ?"
+        params = [self._key]
+        if n is not None:
+            query += " AND n = ?"
+            params.append(n)
+        query += " AND classe = ?" if classe is not None else " AND classe != ?"
+        params.append(classe if classe is not None else INVALID)
+        return self._db.execute(query + " ORDER BY n, classe", params).fetchall()
+
+    def counts(self, n=None, classe=None):
+        """{(n, class): number of puzzles} of the groups matching the filters."""
+        with self._lock:
+            return {(gn, gc): total for gn, gc, total in self._groups(n, classe)}
+
+    def sample(self, k=1, n=None, classe=None, rng=None):
+        """Up to k distinct random file names matching n/classe, in O(k + groups)."""
+        with self._lock:
+            # Uma transação de leitura: totais e slots vêm da mesma versão do manifesto
+            self._db.execute("BEGIN")
+            try:
+                groups = self._groups(n, classe)
+                size = sum(total for _, _, total in groups)
+                names = []
+                for pick in (rng or random).sample(range(size), min(k, size)):
+                    for gn, gc, total in groups:
+                        if pick < total:
+                            break
+                        pick -= total
+                    names.append(self._db.execute(
+                        "SELECT arquivo FROM puzzles WHERE source = ? AND n = ? AND classe = ? AND slot = ?",
+                        (self._key, gn, gc, pick)).fetchone()[0])
+            finally:
+                self._db.execute("COMMIT")
+        return names
+
+    def select(self, n=None, classe=None, limit=None):
+        """Metadata dicts of the puzzles matching n/classe (at most limit)."""
+        query = "SELECT arquivo, n, classe, hash, hist FROM puzzles WHERE source = ?"
+        params = [self._key]
+        if n is not None:
+            query += " AND n = ?"
+            params.append(n)
+        query += " AND classe = ?" if classe is not None else " AND classe != ?"
+        params.append(classe if classe is not None else INVALID)
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [{"arquivo": arquivo, "n": pn, "classe": pc, "hash": digest, "tipos": json.loads(hist)}
+                for arquivo, pn, pc, digest, hist in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+
+def default_manifest(source="puzzles"):
+    """Process-wide manifest of source at resultados/manifest.sqlite, refreshed on every call."""
+    with _manifests_lock:
+        manifest = _manifests.get(source)
+        if manifest is None:
+            manifest = _manifests[source] = Manifest(source)
+    manifest.refresh()
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manifesto dos puzzles (n, classe do veredito, hash, tipos)")
+    parser.add_argument("source", nargs="?", default="puzzles", help="Pasta de puzzles ou corpus .kkc")
+    parser.add_argument("--n", type=int, default=None, help="Só puzzles com N pessoas")
+    parser.add_argument("--class", dest="classe", choices=CLASSES, default=None, help="Classe do veredito")
+    parser.add_argument("--limit", type=int, default=None, help="Máximo de puzzles listados")
+    parser.add_argument("--random", action="store_true", help="Sorteia os puzzles listados (padrão: --limit 1)")
+    parser.add_argument("--counts", action="store_true", help="Só a quantidade por (n, classe)")
+    args = parser.parse_args()
+
+    manifest = Manifest(args.source)
+    updated, removed = manifest.refresh(force=True)
+    print(f"Manifesto atualizado: {updated} puzzles relidos, {removed} removidos")
+
+    if args.counts:
+        for (n, classe), total in manifest.counts(args.n, args.classe).items():
+            print(f"n={n:<6} {classe:<13} {total}")
+    elif args.random:
+        for name in manifest.sample(args.limit or 1, args.n, args.classe):
+            print(name)
+    else:
+        for row in manifest.select(args.n, args.classe, args.limit):
+            tipos = ", ".join(f"{op}={k}" for op, k in sorted(row["tipos"].items()))
+            print(f"{row['arquivo']}  n={row['n']}  {row['classe']}  {row['hash']}  {tipos}")
+    manifest.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+import os
+import glob
+import mmap
+import shutil
+import struct
+import random
+import hashlib
+import argparse
+from functools import lru_cache
+import numpy as np
+from puzzle_ir import parse_puzzle, person_name, PuzzleIR
+
+PACKED_SUFFIX = ".kkc"
+
+# Layout (little-endian): header | index (one record per puzzle) | statements | blob
+#   header: magic, number of puzzles, number of statements, blob size
+#   statements: int32 rows (speaker, op, ref1, ref2), as in PuzzleIR
+#   blob: UTF-8 labels (file names) and non-default names ("\n"-separated)
+HEADER = struct.Struct("<8sQQQ")
+MAGIC = b"KKPACK01"
+INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"),       # primeira linha em statements
+    ("length", "<u4"),       # número de afirmações
+    ("n", "<u4"),            # número de pessoas
+    ("hash", "S16"),         # blake2b do conteúdo (n, nomes, afirmações)
+    ("label_offset", "<u8"),
+    ("label_length", "<u4"),
+    ("names_offset", "<u8"),
+    ("names_length", "<u4"),  # 0: nomes padrão A..Z, AA..ZZ, ...
+])
+STATEMENT_DTYPE = np.dtype("<i4")
+
+
+@lru_cache(maxsize=256)
+def default_names(n):
+    return tuple(person_name(i) for i in range(n))
+
+
+def content_hash(ir):
+    """16-byte hash of a puzzle's content (people and statements), independent of its label."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update("\n".join(ir.names).encode("utf-8"))
+    h.update(np.asarray(ir.statements, dtype=STATEMENT_DTYPE).tobytes())
+    return h.digest()
+
+
+class PackedWriter:
+    """
+    Streams puzzles into a packed corpus. Statements go to a temporary file
+    as they come; close() writes header, index, statements and blob, and the
+    corpus appears atomically at path. Used as a context manager, an exception
+    inside the block discards the temporary file and leaves path untouched.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._statements = open(path + ".stmts.tmp", "wb")
+        self._index = []
+        self._blob = bytearray()
+        self._rows = 0
+
+    def _put_blob(self, text):
+        data = text.encode("utf-8")
+        offset = len(self._blob)
+        self._blob += data
+        return offset, len(data)
+
+    def add(self, ir, label):
+        """Appends one PuzzleIR under label (e.g. 'puzzle12.txt')."""
+        rows = np.asarray(ir.statements, dtype=STATEMENT_DTYPE).reshape(-1, 4)
+        self._statements.write(rows.tobytes())
+        label_offset, label_length = self._put_blob(label)
+        names_offset, names_length = 0, 0
+        if ir.names != default_names(len(ir.names)):
+            names_offset, names_length = self._put_blob("\n".join(ir.names))
+        self._index.append((self._rows, len(rows), len(ir.names), content_hash(ir),
+                            label_offset, label_length, names_offset, names_length))
+        self._rows += len(rows)
+
+    def close(self):
+        self._statements.close()
+        index = np.array(self._index, dtype=INDEX_DTYPE)
+        with open(self.path + ".tmp", "wb") as out:
+            out.write(HEADER.pack(MAGIC, len(index), self._rows, len(self._blob)))
+            out.write(index.tobytes())
+            with open(self.path + ".stmts.tmp", "rb") as statements:
+                shutil.copyfileobj(statements, out)
+            out.write(self._blob)
+        os.replace(self.path + ".tmp", self.path)
+        os.remove(self.path + ".stmts.tmp")
+        return len(index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def abort(self):
+        """Discards what was written so far; any existing corpus at path is kept."""
+        self._statements.close()
+        os.remove(self.path + ".stmts.tmp")
+
+
+class PackedCorpus:
+    """
+    Read-only packed corpus, mapped with mmap: the index and the statement
+    rows are NumPy views over the file (no copy), so opening is O(1) and each
+    puzzle is a slice, with no per-puzzle file access.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, rows, blob_size = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a packed puzzle corpus.")
+        offset = HEADER.size
+        self.index = np.frombuffer(self._mm, dtype=INDEX_DTYPE, count=count, offset=offset)
+        offset += self.index.nbytes
+        self.statements = np.frombuffer(self._mm, dtype=STATEMENT_DTYPE, count=rows * 4,
+                                        offset=offset).reshape(rows, 4)
+        self._blob_offset = offset + self.statements.nbytes
+        self._labels = None
+
+    def __len__(self):
+        return len(self.index)
+
+    def _blob(self, offset, length):
+        start = self._blob_offset + int(offset)
+        return self._mm[start:start + int(length)].decode("utf-8")
+
+    def label(self, i):
+        record = self.index[i]
+        return self._blob(record["label_offset"], record["label_length"])
+
+    def rows(self, i):
+        """Statement rows of puzzle i as an (m, 4) int32 view."""
+        record = self.index[i]
+        start = int(record["offset"])
+        return self.statements[start:start + int(record["length"])]
+
+    def ir(self, i):
+        record = self.index[i]
+        n = int(record["n"])
+        if record["names_length"]:
+            names = tuple(self._blob(record["names_offset"], record["names_length"]).split("\n"))
+        else:
+            names = default_names(n)
+        return PuzzleIR(names, tuple(map(tuple, self.rows(i).tolist())))
+
+    def text(self, i):
+        """Puzzle i in the .txt layout of puzzles/."""
+        from puzzle import render_puzzle
+        return render_puzzle(self.ir(i))
+
+    def find(self, label):
+        """Position of the puzzle with this label (with or without .txt); KeyError if absent."""
+        if self._labels is None:
+            self._labels = {self.label(i): i for i in range(len(self))}
+        return self._labels[label if label.endswith(".txt") else f"{label}.txt"]
+
+    def random_index(self, rng=None):
+        return (rng or random).randrange(len(self))
+
+    def __iter__(self):
+        """(label, PuzzleIR) of every puzzle, in order."""
+        for i in range(len(self)):
+            yield self.label(i), self.ir(i)
+
+    def close(self):
+        self.index = self.statements = None
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # ainda há views abertas: o mapa é liberado junto com elas
+
+
+def is_packed(source):
+    return str(source).endswith(PACKED_SUFFIX) and os.path.isfile(source)
+
+
+def open_packed(path):
+    """
+    PackedCorpus shared by the whole process (one mmap per file). A corpus
+    rewritten in place (new mtime or inode) is mapped again.
+    """
+    st = os.stat(path)
+    return _open_packed(path, st.st_mtime_ns, st.st_ino)
+
+
+@lru_cache(maxsize=8)
+def _open_packed(path, mtime_ns, ino):
+    return PackedCorpus(path)
+
+
+def import_txt(source, path):
+    """Packs the .txt puzzles of a folder (or glob) into path; returns how many."""
+    files = sorted(glob.glob(os.path.join(source, "*.txt")) if os.path.isdir(source) else glob.glob(source))
+    with PackedWriter(path) as writer:
+        for file_path in files:
+            with open(file_path, "r", encoding="utf-8") as f:
+                writer.add(parse_puzzle.__wrapped__(f.read().strip()), os.path.basename(file_path))
+    return len(files)
+
+
+def export_txt(path, out_dir):
+    """Writes every puzzle of a packed corpus back as out_dir/<label>; returns how many."""
+    from puzzle import render_puzzle
+    os.makedirs(out_dir, exist_ok=True)
+    corpus = PackedCorpus(path)
+    try:
+        for label, ir in corpus:
+            with open(os.path.join(out_dir, label), "w", encoding="utf-8") as f:
+                f.write(render_puzzle(ir))
+        return len(corpus)
+    finally:
+        corpus.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corpus de puzzles compactado (binário, lido com mmap)")
+    parser.add_argument("--import-txt", nargs=2, metavar=("ORIGEM", "ARQUIVO"),
+                        help=f"Compacta os .txt de uma pasta/glob em ARQUIVO ({PACKED_SUFFIX})")
+    parser.add_argument("--export-txt", nargs=2, metavar=("ARQUIVO", "PASTA"),
+                        help="Escreve cada puzzle do corpus como .txt na pasta")
+    parser.add_argument("--info", metavar="ARQUIVO", help="Resumo de um corpus compactado")
+    args = parser.parse_args()
+
+    if args.import_txt:
+        total = import_txt(*args.import_txt)
+        print(f"{total} puzzles compactados em {args.import_txt[1]}")
+    if args.export_txt:
+        total = export_txt(*args.export_txt)
+        print(f"{total} puzzles exportados para {args.export_txt[1]}")
+    if args.info:
+        corpus = PackedCorpus(args.info)
+        sizes = corpus.index["n"]
+        print(f"{len(corpus)} puzzles, {len(corpus.statements)} afirmações, "
+              f"n de {sizes.min() if len(sizes) else 0} a {sizes.max() if len(sizes) else 0}")
+        corpus.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+import os
+import shlex
+import random
+import asyncio
+from answer_cache import solve_cached
+from prompts import prompt_sem_z3, prompt_com_z3
+from providers import get_provider, MissingAPIKeyError
+from save_results import compare_results, salva_comparacao
+from packed_corpus import is_packed, open_packed
+from manifest import default_manifest
+
+# Pasta com os puzzleN.txt ou um corpus compactado (.kkc, ver packed_corpus.py)
+PUZZLES_DIR = os.getenv("PUZZLES_DIR", "puzzles")
+
+
+def parse_puzzle_arg(args):
+    """
+    Puzzle name from the web UI/CLI args string: '-p puzzle1', '--puzzle puzzle1.txt'
+    or just 'puzzle1'. Returns None when no puzzle is given.
+    """
+    tokens = shlex.split(args or "")
+    for i, token in enumerate(tokens):
+        if token in ("-p", "--puzzle") and i + 1 < len(tokens):
+            return tokens[i + 1]
+    return tokens[0] if tokens else None
+
+
+# Opções de seleção pelo manifesto aceitas na string de args (CLI e UI web)
+SELECTION_OPTIONS = {"--n": ("n", int), "--class": ("classe", str), "--limit": ("limit", int)}
+
+
+def parse_selection(args):
+    """
+    (puzzle name, filters) from the args string: the name as in parse_puzzle_arg,
+    plus manifest filters, e.g. '--n 8 --class unique --limit 5'.
+    """
+    tokens = shlex.split(args or "")
+    rest, filtros = [], {}
+    i = 0
+    while i < len(tokens):
+        if tokens[i] in SELECTION_OPTIONS and i + 1 < len(tokens):
+            key, kind = SELECTION_OPTIONS[tokens[i]]
+            filtros[key] = kind(tokens[i + 1])
+            i += 2
+        else:
+            rest.append(tokens[i])
+            i += 1
+    return parse_puzzle_arg(shlex.join(rest)), filtros
+
+
+def select_puzzles(puzzle_arg=None, n=None, classe=None, limit=1, puzzles_dir=PUZZLES_DIR):
+    """
+    Puzzles to run: [puzzle_arg] when a name is given, otherwise up to limit
+    distinct random puzzles matching n/classe, drawn from the manifest (see
+    manifest.py) without listing or opening the puzzle files.
+    """
+    if puzzle_arg:
+        return [puzzle_arg]
+    nomes = default_manifest(puzzles_dir).sample(limit, n=n, classe=classe)
+    if not nomes:
+        filtros = ", ".join(f"{k}={v}" for k, v in (("n", n), ("classe", classe)) if v is not None)
+        raise FileNotFoundError(f"Nenhum puzzle encontrado em '{puzzles_dir}'" + (f" com {filtros}." if filtros else "."))
+    return nomes
+
+
+def resolve_puzzle(puzzle_arg=None, puzzles_dir=PUZZLES_DIR):
+    """
+    Picks the puzzle file: the given name (with or without .txt, or an absolute
+    path) or a random one from puzzles_dir. Returns (file name, path); raises
+    FileNotFoundError with the message to show when there is none.
+    """
+    if puzzle_arg:
+        puzzle_arg = puzzle_arg if puzzle_arg.endswith(".txt") else f"{puzzle_arg}.txt"
+        if os.path.isabs(puzzle_arg):
+            caminho_puzzle = puzzle_arg
+        else:
+            caminho_puzzle = os.path.join(puzzles_dir, puzzle_arg)
+
+        if not os.path.exists(caminho_puzzle):
+            raise FileNotFoundError(f"Puzzle '{puzzle_arg}' não encontrado!")
+        return os.path.basename(caminho_puzzle), caminho_puzzle
+
+    arquivos = [f for f in os.listdir(puzzles_dir) if f.endswith(".txt")]
+    if not arquivos:
+        raise FileNotFoundError(f"Nenhum arquivo .txt encontrado na pasta '{puzzles_dir}'.")
+    arquivo_escolhido = random.choice(arquivos)
+    return arquivo_escolhido, os.path.join(puzzles_dir, arquivo_escolhido)
+
+
+def z3_consequences(puzzle):
+    """Consequences of a puzzle (answer cache + Z3); top-level so process pools can run it."""
+    return solve_cached(puzzle)[1]
+
+
+def _z3_text(consequencias):
+    linhas = [f"{nome}: {status}" for nome, status in consequencias.items()]
+    return "\nZ3: Consequências Lógicas (O que é garantido)\n" + "\n".join(linhas)
+
+
+def _compare_text(match, variante):
+    return f"\nLLM ACERTOU O PUZZLE {variante}" if match else f"\nLLM ERROU O PUZZLE {variante}"
+
+
+def _read_packed(puzzle_arg, path):
+    """(label, text) from a packed corpus: by name, or a random one in O(1)."""
+    corpus = open_packed(path)
+    if puzzle_arg:
+        try:
+            i = corpus.find(puzzle_arg)
+        except KeyError:
+            raise FileNotFoundError(f"Puzzle '{puzzle_arg}' não encontrado!")
+    elif len(corpus):
+        i = corpus.random_index()
+    else:
+        raise FileNotFoundError(f"Nenhum puzzle no corpus '{path}'.")
+    return corpus.label(i), corpus.text(i).strip()
+
+
+def _read_puzzle(puzzle_arg):
+    if is_packed(PUZZLES_DIR):
+        return _read_packed(puzzle_arg, PUZZLES_DIR)
+    arquivo_escolhido, caminho_puzzle = resolve_puzzle(puzzle_arg)
+    with open(caminho_puzzle, "r", encoding="utf-8") as f:
+        return arquivo_escolhido, f.read().strip()
+
+
+def solver_events(provider_name, puzzle_arg=None, key_loaded="Chave de API carregada com sucesso",
+                  key_missing="Chave de API não encontrada no arquivo .env.",
+                  results_path="resultados/results.jsonl", comparacoes_path="resultados/comparacoes.txt",
+                  provider_options=None):
+    """
+    Runs the puzzle -> LLM (sem/com Z3) -> Z3 -> comparison flow and yields a
+    (kind, text) event as soon as each step finishes: 'info', 'puzzle', 'llm',
+    'z3', 'comparacao' or 'erro'. Nothing is printed, so concurrent runs stay isolated.
+    With results_path=None the comparison is not saved; provider_options go to get_provider.
+    """
+    # Provider único por processo (carrega o .env e reaproveita o cliente)
+    try:
+        provider = get_provider(provider_name, **(provider_options or {}))
+    except MissingAPIKeyError:
+        yield "erro", key_missing
+        return
+    yield "info", key_loaded
+
+    try:
+        arquivo_escolhido, puzzle = _read_puzzle(puzzle_arg)
+    except FileNotFoundError as e:
+        yield "erro", str(e)
+        return
+    yield "puzzle", puzzle
+
+    # ======= LLM (SEM Z3) =======
+    resposta = provider.generate(prompt_sem_z3(puzzle))
+    yield "llm", "\nSEM Z3\n" + resposta
+
+    # ======= LLM (COM Z3) =======
+    resposta_direta = provider.generate(prompt_com_z3(puzzle))
+    yield "llm", "\nCOM Z3\n" + resposta_direta
+
+    # ======= Z3 (REAL) =======
+    try:
+        # Gabarito em cache: só resolve com Z3 puzzles (ou renomeações) ainda não vistos
+        consequencias = z3_consequences(puzzle)
+    except Exception as e:
+        yield "erro", f"Erro ao resolver com Z3: {e}"
+        return
+    yield "z3", _z3_text(consequencias)
+
+    # Compare without Z3 (registro principal)
+    match = compare_results(resposta, consequencias)
+    if results_path:
+        salva_comparacao(arquivo_escolhido, puzzle, resposta, consequencias, match,
+                         results_path=results_path, comparacoes_path=comparacoes_path, model=provider.model)
+    yield "comparacao", _compare_text(match, "SEM Z3")
+
+    # Compare with Z3 (apenas exibição, não salva em results.jsonl para evitar duplicatas)
+    yield "comparacao", _compare_text(compare_results(resposta_direta, consequencias), "COM Z3")
+
+
+def selection_events(provider_name, puzzle_arg=None, n=None, classe=None, limit=1, **options):
+    """solver_events for every puzzle picked by select_puzzles, one run after the other."""
+    try:
+        nomes = select_puzzles(puzzle_arg, n, classe, limit)
+    except FileNotFoundError as e:
+        yield "erro", str(e)
+        return
+    for nome in nomes:
+        yield from solver_events(provider_name, nome, **options)
+
+
+async def solver_events_async(provider_name, puzzle_arg=None, key_loaded="Chave de API carregada com sucesso",
+                              key_missing="Chave de API não encontrada no arquivo .env.",
+                              results_path="resultados/results.jsonl", comparacoes_path="resultados/comparacoes.txt",
+                              provider_options=None, run_z3=None):
+    """
+    asyncio version of solver_events (same events): the LLM calls stay on the
+    event loop and the Z3 step goes through run_z3, a coroutine function taking
+    the puzzle text (default: z3_consequences in a thread).
+    """
+    run_z3 = run_z3 or (lambda puzzle: asyncio.to_thread(z3_consequences, puzzle))
+    try:
+        provider = get_provider(provider_name, **(provider_options or {}))
+    except MissingAPIKeyError:
+        yield "erro", key_missing
+        return
+    yield "info", key_loaded
+
+    try:
+        arquivo_escolhido, puzzle = await asyncio.to_thread(_read_puzzle, puzzle_arg)
+    except FileNotFoundError as e:
+        yield "erro", str(e)
+        return
+    yield "puzzle", puzzle
+
+    resposta = await provider.agenerate(prompt_sem_z3(puzzle))
+    yield "llm", "\nSEM Z3\n" + resposta
+
+    resposta_direta = await provider.agenerate(prompt_com_z3(puzzle))
+    yield "llm", "\nCOM Z3\n" + resposta_direta
+
+    try:
+        consequencias = await run_z3(puzzle)
+    except Exception as e:
+        yield "erro", f"Erro ao resolver com Z3: {e}"
+        return
+    yield "z3", _z3_text(consequencias)
+
+    match = compare_results(resposta, consequencias)
+    if results_path:
+        await asyncio.to_thread(salva_comparacao, arquivo_escolhido, puzzle, resposta, consequencias, match,
+                                results_path=results_path, comparacoes_path=comparacoes_path,
+                                model=provider.model)
+    yield "comparacao", _compare_text(match, "SEM Z3")
+    yield "comparacao", _compare_text(compare_results(resposta_direta, consequencias), "COM Z3")
+
+
+def print_events(events):
+    """Terminal mode: prints each event as it arrives."""
+    for _, text in events:
+        print(text, flush=True)
+
+
+def stream_lines(events):
+    """Web mode: turns events into output lines, yielded as soon as each event arrives."""
+    try:
+        for _, text in events:
+            for line in text.splitlines():
+                yield line
+    except Exception as e:
+        yield f"Erro: {e}"
@@ -0,0 +1,23 @@
+def prompt_sem_z3(puzzle):
+    """Prompt que pede a resposta direta do puzzle, sem citar o Z3."""
+    return (
+        puzzle + ". Diretamente resolva o problema: Quem podemos garantir (Ou quem é consequência lógica) que é cavaleiro e quem é patife?"
+        " Responda de forma direta, poucas linhas, exemplo: A: Cavaleiro\n B: Patife\n C: Indeterminado\nNão é necessário exibir a cadeia de pensamento, sempre em ordem alfabética,"
+        " para problemas impossíveis, retorne: Inconsistente para todas as pessoas"
+    )
+
+
+def prompt_com_z3(puzzle):
+    """Prompt que pede para a LLM traduzir o puzzle para o Z3 antes de responder."""
+    return (
+        puzzle + " Agora com ajuda da biblioteca Z3, traduza o problema para Z3 e resolva (Não é necessário envio do código): "
+        "Quem podemos garantir que é cavaleiro e quem é patife? Responda de forma direta, poucas linhas, apenas informando o que é "
+        "garantido ou não exemplo: A: Cavaleiro\n B: Patife\n C: Indeterminado\n"
+        "Não é necessário exibir a cadeia de pensamento, sempre em ordem alfabética, para problemas impossíveis, retorne: Inconsistente para todas as pessoas"
+    )
+
+
+PROMPT_VARIANTS = {
+    "sem_z3": prompt_sem_z3,
+    "com_z3": prompt_com_z3,
+}
@@ -0,0 +1,145 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from dotenv import load_dotenv
+from llm_cache import cache_mode, CachedProvider
+
+
+class MissingAPIKeyError(RuntimeError):
+    """The provider's API key is not set in the environment / .env file."""
+
+
+def _api_key(env_var):
+    api_key = os.getenv(env_var)
+    if not api_key:
+        raise MissingAPIKeyError(f"{env_var} não encontrada no arquivo .env.")
+    return api_key
+
+
+class GeminiProvider:
+    """The SDK client is created on the first call and then reused by the process."""
+    name = "gemini"
+    api_key_env = "API_KEY"
+
+    def __init__(self, model="gemini-2.5-flash"):
+        self.model = model
+        self.params = {}
+        self._model = None
+
+    def _client(self):
+        if self._model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=_api_key(self.api_key_env))
+            self._model = genai.GenerativeModel(self.model)
+        return self._model
+
+    def generate(self, prompt):
+        return self._client().generate_content(prompt).text
+
+    async def agenerate(self, prompt):
+        resposta = await self._client().generate_content_async(prompt)
+        return resposta.text
+
+
+class OpenAIProvider:
+    """One OpenAI client per process: its HTTP pool keeps connections alive between calls."""
+    name = "openai"
+    api_key_env = "OPENAI_API_KEY"
+
+    def __init__(self, model=None):
+        self.model = model or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+        self.params = {"temperature": 0}
+        self._sync_client = None
+        self._async_client = None
+
+    def _request(self, prompt):
+        return {"model": self.model, "messages": [{"role": "user", "content": prompt}], **self.params}
+
+    def generate(self, prompt):
+        if self._sync_client is None:
+            from openai import OpenAI
+            self._sync_client = OpenAI(api_key=_api_key(self.api_key_env))
+        resp = self._sync_client.chat.completions.create(**self._request(prompt))
+        return resp.choices[0].message.content
+
+    async def agenerate(self, prompt):
+        if self._async_client is None:
+            from openai import AsyncOpenAI
+            self._async_client = AsyncOpenAI(api_key=_api_key(self.api_key_env))
+        resp = await self._async_client.chat.completions.create(**self._request(prompt))
+        return resp.choices[0].message.content
+
+
+class StubProvider:
+    """
+    Local offline provider: answers with the Z3 ground truth of the puzzle inside
+    the prompt after a simulated latency, optionally failing or erring at random.
+    """
+    name = "stub"
+    api_key_env = None
+
+    def __init__(self, model="stub", latency=0.05, error_rate=0.0, wrong_rate=0.0):
+        self.model = model
+        self.latency = latency
+        self.error_rate = error_rate
+        self.wrong_rate = wrong_rate
+
+    def _answer(self, prompt):
+        from answer_cache import solve_cached
+        if random.random() < self.error_rate:
+            raise RuntimeError("stub: falha simulada")
+        _, consequencias = solve_cached(prompt)
+        linhas = []
+        for pessoa, status in consequencias.items():
+            veredito = status.split()[0]
+            if random.random() < self.wrong_rate:
+                veredito = "Patife" if veredito == "Cavaleiro" else "Cavaleiro"
+            linhas.append(f"{pessoa}: {veredito}")
+        return "\n".join(linhas)
+
+    def generate(self, prompt):
+        time.sleep(self.latency)
+        return self._answer(prompt)
+
+    async def agenerate(self, prompt):
+        await asyncio.sleep(self.latency)
+        # Gabarito (SQLite/Z3) fora do event loop
+        return await asyncio.to_thread(self._answer, prompt)
+
+
+PROVIDERS = {
+    "gemini": GeminiProvider,
+    "openai": OpenAIProvider,
+    "stub": StubProvider,
+}
+
+_instances = {}
+_lock = threading.Lock()
+
+
+def get_provider(name, **options):
+    """
+    Returns the process-wide provider `name` (gemini, openai or stub), creating
+    it (and loading .env) on the first call, so clients and their connections
+    are reused by every request. Raises MissingAPIKeyError without a key.
+
+    Unless LLM_CACHE=off, API providers are wrapped by the response cache
+    (see llm_cache); with LLM_CACHE=replay no key is needed and the network
+    is never used.
+    """
+    if name not in PROVIDERS:
+        raise ValueError(f"Provider desconhecido: {name} (use um de: {', '.join(PROVIDERS)})")
+    key = (name, tuple(sorted(options.items())))
+    with _lock:
+        if key not in _instances:
+            load_dotenv()
+            provider = PROVIDERS[name](**options)
+            mode = cache_mode()
+            if mode != "replay" and provider.api_key_env:
+                _api_key(provider.api_key_env)
+            # O stub é local: só as respostas de APIs reais vão para o cache
+            cached = mode != "off" and provider.api_key_env is not None
+            _instances[key] = CachedProvider(provider) if cached else provider
+        return _instances[key]
@@ -1,17 +1,18 @@
-from random import seed, randint, choice
+import random
+import itertools
+from functools import lru_cache
 from solverz3 import parse_puzzle_to_z3, generic_solver
+from solvergf2 import EchelonBasis, statement_equation
+from puzzle_ir import (PuzzleIR, render_statement, satisfies, person_name, NO_REF, OP_CODES,
+                       CAVALEIRO, PATIFE, EU_DIFERENTES, EU_IGUAIS, SOMOS_IGUAIS, SAO_IGUAIS,
+                       EU_CAVALEIRO, EU_PATIFE, SOMOS_DIFERENTES, SAO_DIFERENTES)
+from file_lock import FileLock
 import os
 import re
+import argparse
 
-def save_puzzle_txt(texto, pasta_base):
-    """
-    Saves the text to a file named 'puzzle{n}.txt' in the specified folder,
-    where 'n' is the next sequential number.
-
-    :param texto: The content to be saved in the file.
-    :param pasta_base: The path to the folder (e.g., 'puzzle').
-    """
-
+def _next_puzzle_number(pasta_base):
+    """Returns the number after the highest 'puzzle{n}.txt' in the folder (creating it if needed)."""
     if not os.path.exists(pasta_base):
         os.makedirs(pasta_base)
         print(f"Pasta '{pasta_base}' criada.")
@@ -31,7 +32,52 @@ def save_puzzle_txt(texto, pasta_base):
                 maior_numero = numero_existente
 
 
-    proximo_numero = maior_numero + 1
+    return maior_numero + 1
+
+
+# Próximo número livre de cada pasta, para não listar a pasta a cada puzzle salvo
+COUNTER_FILE = ".proximo"
+
+
+def reserve_puzzle_numbers(pasta_base, count=1):
+    """
+    Reserves count consecutive puzzle numbers in the folder and returns the
+    first one. The next free number is kept in pasta_base/.proximo under a file
+    lock, so concurrent writers get disjoint ranges and saving does not list the
+    folder; the counter is rebuilt with one listdir if missing or stale (a file
+    with the next number already exists).
+    """
+    if not os.path.exists(pasta_base):
+        os.makedirs(pasta_base, exist_ok=True)
+    counter = os.path.join(pasta_base, COUNTER_FILE)
+    lock = FileLock(counter)
+    try:
+        with lock:
+            try:
+                with open(counter, 'r', encoding='utf-8') as f:
+                    primeiro = int(f.read())
+            except (OSError, ValueError):
+                primeiro = _next_puzzle_number(pasta_base)
+            if os.path.exists(os.path.join(pasta_base, f"puzzle{primeiro}.txt")):
+                primeiro = _next_puzzle_number(pasta_base)
+            with open(counter + ".tmp", 'w', encoding='utf-8') as f:
+                f.write(str(primeiro + count))
+            os.replace(counter + ".tmp", counter)
+    finally:
+        lock.close()
+    return primeiro
+
+
+def save_puzzle_txt(texto, pasta_base):
+    """
+    Saves the text to a file named 'puzzle{n}.txt' in the specified folder,
+    where 'n' is the next sequential number.
+
+    :param texto: The content to be saved in the file.
+    :param pasta_base: The path to the folder (e.g., 'puzzle').
+    """
+
+    proximo_numero = reserve_puzzle_numbers(pasta_base)
 
     novo_nome_arquivo = f"puzzle{proximo_numero}.txt"
     caminho_completo = os.path.join(pasta_base, novo_nome_arquivo)
@@ -44,38 +90,347 @@ def save_puzzle_txt(texto, pasta_base):
         print(f"Erro ao salvar o arquivo: {e}")
 
 
-def generate_generic_puzzle(n: int):
-    """Returns a satisfiable generic Knights and Knaives puzzle with n people.""" #unicode \u0085 for Next Line
-
-    puzzle_text = 'Em uma ilha vivem apenas cavaleiros e patifes.' + '\n' + 'Cavaleiros sempre dizem a verdade, e patifes sempre mentem.' + '\n'
-    seed()
-    alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
-    for i in range(1, n+1):
-        current_person = alphabet[i-1]
-        random_p1 = alphabet[randint(0, n-1)]
-        random_p2 = alphabet[randint(0, n-1)]
-
-        while random_p1 == current_person:
-            random_p1 = alphabet[randint(0, n-1)]
-        while random_p2 == current_person or random_p2 == random_p1:
-            random_p2 = alphabet[randint(0, n-1)]
-
-        line = f'{current_person} diz: ' + choice([f"'{random_p1} é um cavaleiro.'\n",
-                                     f"'{random_p1} é um patife.'\n",
-                                     f"'{random_p1} e eu somos diferentes.'\n",
-                                     f"'{random_p1} e eu somos iguais.'\n",
-                                     f"'{random_p1} e {random_p2} são iguais.'\n",
-                                     f"'{random_p1} e {random_p2} são diferentes.'\n"])
-        puzzle_text += line
- 
-    variables, restrictions = parse_puzzle_to_z3(puzzle_text)
-    if generic_solver(variables, restrictions) in ["Inconsistente (sem solução)", "Indefinido (solver não conseguiu decidir)"]:
-        return generate_generic_puzzle(n)
-    return puzzle_text + 'Quem é cavaleiro e quem é patife?\n'
+def save_puzzles_txt(textos, pasta_base, count=None):
+    """
+    Bulk version of save_puzzle_txt: one range of numbers is reserved and every
+    text of the iterable is saved under the following sequential numbers. Pass
+    count (the number of texts) to keep a lazy iterable lazy.
+    Returns how many files were written.
+    """
+    if count is None:
+        textos = list(textos)
+        count = len(textos)
+    proximo_numero = reserve_puzzle_numbers(pasta_base, count)
+    salvos = 0
+    for texto in textos:
+        caminho_completo = os.path.join(pasta_base, f"puzzle{proximo_numero + salvos}.txt")
+        with open(caminho_completo, 'w', encoding='utf-8') as f:
+            f.write(texto)
+        salvos += 1
+    return salvos
+
+
+PUZZLE_HEADER = 'Em uma ilha vivem apenas cavaleiros e patifes.' + '\n' + 'Cavaleiros sempre dizem a verdade, e patifes sempre mentem.' + '\n'
+PUZZLE_QUESTION = 'Quem é cavaleiro e quem é patife?\n'
+
+# Forms drawn by the generator: (op, number of people referenced)
+GENERATED_FORMS = [(CAVALEIRO, 1), (PATIFE, 1), (EU_DIFERENTES, 1), (EU_IGUAIS, 1),
+                   (SAO_IGUAIS, 2), (SAO_DIFERENTES, 2)]
+
+# Number of people referenced by every statement form
+STATEMENT_REFS = {PATIFE: 1, CAVALEIRO: 1, EU_DIFERENTES: 1, EU_IGUAIS: 1, SOMOS_IGUAIS: 2,
+                  SAO_IGUAIS: 2, EU_CAVALEIRO: 0, EU_PATIFE: 0, SOMOS_DIFERENTES: 2, SAO_DIFERENTES: 2}
+
+# Misturas nomeadas de tipos de afirmação (corpus e benchmarks)
+FORM_MIXES = {
+    "todas": GENERATED_FORMS,
+    "simples": [(CAVALEIRO, 1), (PATIFE, 1)],
+    "eu": [(EU_DIFERENTES, 1), (EU_IGUAIS, 1)],
+    "pares": [(SAO_IGUAIS, 2), (SAO_DIFERENTES, 2)],
+}
+
+# Tentativas por afirmação antes de desistir (formas restritas podem não ter candidata válida)
+MAX_STATEMENT_ATTEMPTS = 10_000
+# Atribuições ocultas sorteadas pelo gerador com alvo antes de desistir
+MAX_TARGET_RESTARTS = 20
+# Até este n, o alcance de um perfil é conferido em todos os subespaços possíveis
+SPAN_CHECK_MAX_N = 6
+
+
+def render_puzzle(ir):
+    """Renders a PuzzleIR as the puzzle text saved in puzzles/."""
+    lines = [render_statement(ir.names, s) + '\n' for s in ir.statements]
+    return PUZZLE_HEADER + ''.join(lines) + PUZZLE_QUESTION
+
+
+def _random_statement(rng, n, current, op, refs):
+    """A statement of form op by person current about refs other random people."""
+    random_p1 = random_p2 = NO_REF
+    if refs >= 1:
+        random_p1 = rng.randint(0, n-1)
+        while random_p1 == current:
+            random_p1 = rng.randint(0, n-1)
+    if refs == 2:
+        random_p2 = rng.randint(0, n-1)
+        while random_p2 == current or random_p2 == random_p1:
+            random_p2 = rng.randint(0, n-1)
+    return (current, op, random_p1, random_p2)
+
+
+def sample_puzzle_ir(n: int, prefix=None, forms=None, density=1, rng=None):
+    """
+    Samples a satisfiable generic puzzle with n people straight into the IR.
+
+    A hidden assignment is drawn first and each candidate statement is kept
+    only if that assignment satisfies it, so the check is O(1) per statement
+    and the puzzle is satisfiable by construction, without calling a solver.
+    People are named A..Z, AA..ZZ, ... or, with a prefix, P1..Pn.
+    forms restricts the statement mix (default GENERATED_FORMS), density is the
+    number of statements per person and rng a random.Random (default: the
+    module-level generator) for reproducible puzzles.
+    """
+    if n < 2:
+        raise ValueError("A generic puzzle needs at least 2 people.")
+    rng = rng or random
+
+    names = tuple(person_name(i, prefix) for i in range(n))
+    hidden = [bool(rng.randint(0, 1)) for _ in range(n)]
+    forms = forms or GENERATED_FORMS
+    # Com 2 pessoas não existe um segundo referenciado diferente do primeiro
+    if n == 2:
+        forms = [f for f in forms if f[1] == 1]
+        if not forms:
+            raise ValueError("Puzzles with 2 people need single-reference statement forms.")
+
+    statements = []
+    for current in (p for p in range(n) for _ in range(density)):
+        for _ in range(MAX_STATEMENT_ATTEMPTS):
+            op, refs = rng.choice(forms)
+            statement = _random_statement(rng, n, current, op, refs)
+            if satisfies(hidden, statement):
+                statements.append(statement)
+                break
+        else:
+            # Ex.: só "são iguais" e um patife cujos outros são todos do mesmo tipo
+            raise ValueError("No statement of the given forms fits the hidden assignment; widen the forms.")
+
+    return PuzzleIR(names, tuple(statements))
+
+
+def iter_generic_puzzles(n: int, count=None, prefix=None, forms=None, density=1, rng=None):
+    """Lazily yields satisfiable generic puzzles with n people (forever when count is None)."""
+    produced = 0
+    while count is None or produced < count:
+        yield render_puzzle(sample_puzzle_ir(n, prefix, forms, density, rng))
+        produced += 1
+
+
+def generate_generic_puzzle(n: int, prefix=None, forms=None, density=1, rng=None):
+    """Returns a satisfiable generic Knights and Knaives puzzle with n people."""
+    return next(iter_generic_puzzles(n, prefix=prefix, forms=forms, density=density, rng=rng))
+
+
+def _build_targeted(n, determined, required, names, forms, rng):
+    """One attempt of sample_targeted_ir for a hidden assignment; None if it gets stuck."""
+    hidden = [bool(rng.randint(0, 1)) for _ in range(n)]
+    basis = EchelonBasis(n)
+    # Quem será determinado é sorteado antes. closure é a base com esses já forçados: uma
+    # afirmação que ali force mais alguém tornaria o alvo inalcançável e é recusada
+    closure = None
+    if determined is not None:
+        closure = EchelonBasis(n)
+        chase = rng.sample(range(n), determined)
+        for x in chase:
+            closure.add((x,))
+    statements = []
+    silent = list(range(n))
+    rng.shuffle(silent)
+
+    def forcing():
+        return determined is not None and len(basis.forced) < determined
+
+    while silent or required or forcing():
+        covering = bool(silent)
+        speaker = silent.pop() if covering else None
+        candidates = [(op, STATEMENT_REFS[op]) for op in required]
+        if covering or not candidates:
+            candidates += forms
+        for _ in range(MAX_STATEMENT_ATTEMPTS):
+            if covering:
+                current = speaker
+            elif forcing() and not required:
+                current = rng.choice(chase)
+            else:
+                current = rng.randint(0, n-1)
+            op, refs = rng.choice(candidates)
+            statement = _random_statement(rng, n, current, op, refs)
+            if not satisfies(hidden, statement):
+                continue
+            people, _ = statement_equation(statement)
+            outside = False
+            if closure is not None:
+                outside, newly_forced = closure.effect(people)
+                if newly_forced:
+                    continue
+            independent, _ = basis.effect(people)
+            # Fora da cobertura e das formas exigidas só entra o que aproxima a base do alvo
+            if covering or op in required or (independent and not outside and forcing()):
+                break
+        else:
+            return None
+
+        basis.add(people)
+        if closure is not None:
+            closure.add(people)
+        statements.append(statement)
+        if op in required:
+            required[op] -= 1
+            if not required[op]:
+                del required[op]
+
+    statements.sort(key=lambda statement: statement[0])
+    return PuzzleIR(names, tuple(statements))
+
+
+def _fits_role(n, determined, op, refs, speaker_determined):
+    """
+    True if some statement of form op by a determined (or undetermined) speaker
+    forces nobody outside the determined set: with the determined people
+    already forced, the equation must not be left with exactly one other person.
+    """
+    # Papéis na equação: 0 = quem fala, 1 e 2 = referenciados
+    people, _ = statement_equation((0, op, 1 if refs >= 1 else NO_REF, 2 if refs == 2 else NO_REF))
+    for placed in itertools.product((True, False), repeat=refs):
+        inside = (speaker_determined,) + placed
+        if sum(inside) > determined or len(inside) - sum(inside) > n - determined:
+            continue
+        if sum(1 for x in people if not inside[x]) != 1:
+            return True
+    return False
+
+
+def _equation_size(op, refs):
+    """How many people the GF(2) equation of a statement of form op involves."""
+    return len(statement_equation((0, op, 1 if refs >= 1 else NO_REF, 2 if refs == 2 else NO_REF))[0])
+
+
+@lru_cache(maxsize=64)
+def _reachable_determined(n, sizes):
+    """
+    Every number of forced people a puzzle with n people can reach when each
+    equation involves exactly one of `sizes` people: the solution spaces are
+    the GF(2) spans of such equations (constants aside), enumerated breadth-first.
+    """
+    vectors = [sum(1 << x for x in people)
+               for size in sizes for people in itertools.combinations(range(n), size)]
+    spaces = {frozenset([0])}
+    frontier = list(spaces)
+    while frontier:
+        grown = []
+        for space in frontier:
+            for v in vectors:
+                if v not in space:
+                    larger = space | {w ^ v for w in space}
+                    if larger not in spaces:
+                        spaces.add(larger)
+                        grown.append(larger)
+        frontier = grown
+    return frozenset(sum(1 << x in space for x in range(n)) for space in spaces)
+
+
+def _unreachable_profile(n, determined, forms):
+    """
+    Why no puzzle with exactly `determined` forced people can use these forms,
+    or None. Up to SPAN_CHECK_MAX_N people the check is exhaustive; above it
+    only the cheap rules run, and the generator may still give up later.
+    """
+    if determined > 0 and all(len(statement_equation((0, op, 1, 2))[0]) % 2 == 0 for op, _ in forms):
+        # Só equações com duas pessoas: inverter todos mantém as afirmações, ninguém é forçado
+        return "these statement forms never determine anybody"
+    for speaker_determined, role in ((True, "a determined"), (False, "an undetermined")):
+        present = determined if speaker_determined else n - determined
+        if present and not any(_fits_role(n, determined, op, refs, speaker_determined) for op, refs in forms):
+            return f"{role} person cannot speak without determining somebody else"
+    if n <= SPAN_CHECK_MAX_N:
+        sizes = tuple(sorted({_equation_size(op, refs) for op, refs in forms}))
+        if determined not in _reachable_determined(n, sizes):
+            return "no combination of these statement forms forces exactly that many people"
+    return None
+
+
+def sample_targeted_ir(n: int, unique=False, determined=None, require=None, prefix=None, forms=None,
+                       rng=None):
+    """
+    Builds a satisfiable puzzle one statement at a time until it has the
+    requested profile: unique (exactly one solution), determined=k (exactly k
+    people forced, the others undetermined) and/or require ({op: minimum
+    count} of statement types). Each candidate must hold under the hidden
+    assignment, and its effect on the solution space is read from an
+    incremental GF(2) basis (solvergf2.EchelonBasis) before it is kept, so
+    puzzles are not generated and thrown away; only a hidden assignment that
+    admits no fitting statement is redrawn. Every person speaks at least once.
+    Raises ValueError when the forms cannot reach the profile (checked up
+    front for determined, exhaustively for small n, see _unreachable_profile).
+    """
+    if n < 2:
+        raise ValueError("A generic puzzle needs at least 2 people.")
+    if unique:
+        # Solução única: todos determinados
+        if determined not in (None, n):
+            raise ValueError("A unique solution determines every person.")
+        determined = n
+    if not 0 <= (determined or 0) <= n:
+        raise ValueError(f"determined must be between 0 and {n}.")
+    rng = rng or random
+
+    forms = forms or GENERATED_FORMS
+    required = {op: count for op, count in (require or {}).items() if count > 0}
+    if n == 2:
+        forms = [f for f in forms if f[1] < 2]
+        if not forms or any(STATEMENT_REFS[op] == 2 for op in required):
+            raise ValueError("Puzzles with 2 people need statement forms with at most one reference.")
+
+    if determined is not None:
+        reason = _unreachable_profile(n, determined, forms)
+        if reason:
+            raise ValueError(f"No puzzle with {n} people and exactly {determined} determined fits the "
+                             f"statement forms: {reason}. Change determined or widen the forms.")
+
+    names = tuple(person_name(i, prefix) for i in range(n))
+    for _ in range(MAX_TARGET_RESTARTS):
+        ir = _build_targeted(n, determined, dict(required), names, forms, rng)
+        if ir is not None:
+            return ir
+    raise ValueError("No statement of the given forms moves the puzzle towards the requested profile; "
+                     "widen the forms.")
+
+
+def generate_targeted_puzzle(n: int, unique=False, determined=None, require=None, prefix=None, forms=None,
+                             rng=None):
+    """Returns a puzzle with n people and the requested profile (see sample_targeted_ir)."""
+    return render_puzzle(sample_targeted_ir(n, unique, determined, require, prefix, forms, rng))
+
+
+def parse_require(text):
+    """Parses "sao_iguais=2,patife=1" into {op code: minimum count}."""
+    require = {}
+    for item in filter(None, (part.strip() for part in (text or "").split(","))):
+        op, _, count = item.partition("=")
+        if op not in OP_CODES:
+            raise ValueError(f"Unknown statement type: {op} (use one of {', '.join(OP_CODES)})")
+        require[OP_CODES[op]] = int(count or 1)
+    return require
 
 
 def main():
-    puzzle = generate_generic_puzzle(3)
+    parser = argparse.ArgumentParser(description="Gera puzzles genéricos de cavaleiros e patifes")
+    parser.add_argument("-n", type=int, default=3, help="Número de pessoas (padrão: 3)")
+    parser.add_argument("--count", type=int, default=1, help="Quantidade de puzzles a gerar e salvar")
+    parser.add_argument("--out", default="puzzles", help="Pasta de saída (padrão: puzzles)")
+    parser.add_argument("--prefix", default=None,
+                        help="Prefixo dos nomes (ex: P gera P1..Pn); padrão: A..Z, AA..ZZ, ...")
+    parser.add_argument("--seed", type=int, default=None, help="Semente para gerar puzzles reproduzíveis")
+    parser.add_argument("--unique", action="store_true", help="Só puzzles com solução única")
+    parser.add_argument("--determined", type=int, default=None,
+                        help="Exatamente K pessoas determinadas (as demais indeterminadas)")
+    parser.add_argument("--require", default=None,
+                        help="Quantidade mínima por tipo de afirmação, ex: sao_iguais=2,patife=1")
+    args = parser.parse_args()
+    rng = random.Random(args.seed) if args.seed is not None else None
+
+    if args.unique or args.determined is not None or args.require:
+        require = parse_require(args.require)
+        puzzles = (generate_targeted_puzzle(args.n, args.unique, args.determined, require, args.prefix, rng=rng)
+                   for _ in range(args.count))
+    else:
+        puzzles = iter_generic_puzzles(args.n, args.count, args.prefix, rng=rng)
+
+    if args.count > 1:
+        salvos = save_puzzles_txt(puzzles, args.out, args.count)
+        print(f"{salvos} puzzles salvos em: {args.out}")
+        return
+
+    puzzle = next(puzzles)
     print(puzzle)
     variables, restrictions = parse_puzzle_to_z3(puzzle)
     resultado_z3 = generic_solver(variables, restrictions)
@@ -85,9 +440,8 @@ def main():
             print(f"{p}: {'Cavaleiro' if v else 'Patife'}")
     else:
         print(resultado_z3)
-    save_puzzle_txt(puzzle, 'puzzles')
+    save_puzzle_txt(puzzle, args.out)
 
 
 if __name__ == '__main__':
     main()
-    
\ No newline at end of file
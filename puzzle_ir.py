@@ -0,0 +1,217 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+# Bump when a change to the parser can alter the IR of an existing text
+PARSER_VERSION = 1
+
+# Operation codes of the intermediate representation, in the order the
+# statement forms are recognised
+OPS = (
+    "patife",            # "X é um patife"
+    "cavaleiro",         # "X é um cavaleiro"
+    "eu_diferentes",     # "X e eu somos diferentes"
+    "eu_iguais",         # "X e eu somos iguais"
+    "somos_iguais",      # "X e Y somos iguais"
+    "sao_iguais",        # "X e Y são iguais"
+    "eu_cavaleiro",      # "Eu sou um cavaleiro"
+    "eu_patife",         # "Eu sou um patife"
+    "somos_diferentes",  # "X e Y somos diferentes"
+    "sao_diferentes",    # "X e Y são diferentes"
+)
+(PATIFE, CAVALEIRO, EU_DIFERENTES, EU_IGUAIS, SOMOS_IGUAIS, SAO_IGUAIS,
+ EU_CAVALEIRO, EU_PATIFE, SOMOS_DIFERENTES, SAO_DIFERENTES) = range(len(OPS))
+OP_CODES = {op: code for code, op in enumerate(OPS)}
+
+# Value of ref1/ref2 when the statement does not reference anybody
+NO_REF = -1
+
+# Person identifiers: A..Z, AA..ZZ, AAA... or a prefix with a number (P1..Pn)
+_NAME = r"[A-Z]+[0-9]*"
+NAME_RE = re.compile(_NAME)
+_FORMS = {
+    "patife": r"(?P<patife_r1>{N})\s+é\s+um\s+patife",
+    "cavaleiro": r"(?P<cavaleiro_r1>{N})\s+é\s+um\s+cavaleiro",
+    "eu_diferentes": r"(?P<eu_diferentes_r1>{N})\s+e\s+eu\s+somos\s+diferentes",
+    "eu_iguais": r"(?P<eu_iguais_r1>{N})\s+e\s+eu\s+somos\s+iguais",
+    "somos_iguais": r"(?P<somos_iguais_r1>{N})\s+e\s+(?P<somos_iguais_r2>{N})\s+somos\s+iguais",
+    "sao_iguais": r"(?P<sao_iguais_r1>{N})\s+e\s+(?P<sao_iguais_r2>{N})\s+são\s+iguais",
+    "eu_cavaleiro": r"Eu sou um cavaleiro",
+    "eu_patife": r"Eu sou um patife",
+    "somos_diferentes": r"(?P<somos_diferentes_r1>{N})\s+e\s+(?P<somos_diferentes_r2>{N})\s+somos\s+diferentes",
+    "sao_diferentes": r"(?P<sao_diferentes_r1>{N})\s+e\s+(?P<sao_diferentes_r2>{N})\s+são\s+diferentes",
+}
+
+# One alternation for every "X diz: '...'": the speaker is always captured and,
+# when the statement is recognised, the outer group of its form is the last
+# one to close, so match.lastgroup names the operation.
+_STATEMENT_RE = re.compile(
+    r"\b(?P<speaker>{N})\s+diz:(?:\s*'\s*(?:".replace("{N}", _NAME)
+    + "|".join(f"(?P<{op}>{form.replace('{N}', _NAME)})" for op, form in _FORMS.items())
+    + r")[^']*')?"
+)
+_REF_GROUPS = {
+    op: tuple(g for g in (f"{op}_r1", f"{op}_r2") if g in _STATEMENT_RE.groupindex)
+    for op in OPS
+}
+
+
+def person_name(i, prefix=None):
+    """
+    Name of the i-th person (0-based): A..Z, AA..ZZ, AAA... in spreadsheet order,
+    or f"{prefix}{i+1}" (e.g. P1..Pn) when a prefix is given.
+    """
+    if prefix:
+        return f"{prefix}{i + 1}"
+    name = ""
+    i += 1
+    while i:
+        i, rest = divmod(i - 1, 26)
+        name = chr(ord("A") + rest) + name
+    return name
+
+
+def name_sort_key(name):
+    """Natural order of identifiers: B < Z < AA and P2 < P10."""
+    letters = name.rstrip("0123456789")
+    digits = name[len(letters):]
+    return len(letters), letters, int(digits) if digits else -1
+
+
+class PuzzleIR(NamedTuple):
+    """
+    Solver-agnostic, hashable form of a parsed puzzle.
+    names: people in index order; statements: (speaker, op, ref1, ref2) small ints,
+    with NO_REF for unused references.
+    """
+    names: tuple
+    statements: tuple
+
+
+@lru_cache(maxsize=4096)
+def parse_puzzle(puzzle_text):
+    """
+    Parses simple Knights and Knaves puzzles (A, B, C, ...) in a single pass of
+    one precompiled regex. Results are cached by text, so every caller shares it.
+    """
+    speakers = set()
+    raw = []
+    for m in _STATEMENT_RE.finditer(puzzle_text):
+        speaker = m.group("speaker")
+        speakers.add(speaker)
+        op = m.lastgroup
+        if op != "speaker":
+            raw.append((speaker, op) + tuple(m.group(g) for g in _REF_GROUPS[op]))
+
+    if not speakers:
+        raise ValueError("No characters found in the puzzle text.")
+    if not raw:
+        raise ValueError("No recognizable constraints found in the puzzle.")
+
+    names = tuple(sorted(speakers, key=name_sort_key))
+    index = {n: i for i, n in enumerate(names)}
+    statements = []
+    for speaker, op, *refs in raw:
+        for r in refs:
+            if r not in index:
+                # Só quem fala é uma pessoa do puzzle
+                raise ValueError(f"Pessoa desconhecida: {r}")
+        refs = [index[r] for r in refs] + [NO_REF] * (2 - len(refs))
+        statements.append((index[speaker], OP_CODES[op], refs[0], refs[1]))
+
+    return PuzzleIR(names, tuple(statements))
+
+
+def connected_components(ir):
+    """
+    Splits a puzzle into independent sub-puzzles: people linked by a statement
+    (the speaker and the people it references), even indirectly, share a
+    component. Returns a list of (people, sub_ir), where people holds the
+    original indices of sub_ir.names in their original order.
+    """
+    n = len(ir.names)
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for s, _, ref1, ref2 in ir.statements:
+        for ref in (ref1, ref2):
+            if ref != NO_REF:
+                a, b = find(s), find(ref)
+                if a != b:
+                    parent[b] = a
+
+    groups = {}
+    for x in range(n):
+        groups.setdefault(find(x), []).append(x)
+    if len(groups) == 1:
+        return [(list(range(n)), ir)]
+
+    position = {NO_REF: NO_REF}
+    for people in groups.values():
+        for i, x in enumerate(people):
+            position[x] = i
+    statements = {root: [] for root in groups}
+    for s, op, ref1, ref2 in ir.statements:
+        statements[find(s)].append((position[s], op, position[ref1], position[ref2]))
+    return [(people, PuzzleIR(tuple(ir.names[x] for x in people), tuple(statements[root])))
+            for root, people in groups.items()]
+
+
+# Text of each statement form, the inverse of the regex above
+STATEMENT_TEMPLATES = {
+    PATIFE: "{r1} é um patife.",
+    CAVALEIRO: "{r1} é um cavaleiro.",
+    EU_DIFERENTES: "{r1} e eu somos diferentes.",
+    EU_IGUAIS: "{r1} e eu somos iguais.",
+    SOMOS_IGUAIS: "{r1} e {r2} somos iguais.",
+    SAO_IGUAIS: "{r1} e {r2} são iguais.",
+    EU_CAVALEIRO: "Eu sou um cavaleiro.",
+    EU_PATIFE: "Eu sou um patife.",
+    SOMOS_DIFERENTES: "{r1} e {r2} somos diferentes.",
+    SAO_DIFERENTES: "{r1} e {r2} são diferentes.",
+}
+
+
+def render_statement(names, statement):
+    """Renders one IR statement back to the "X diz: '...'" line (without newline)."""
+    n, op, ref1, ref2 = statement
+    text = STATEMENT_TEMPLATES[op].format(
+        r1=names[ref1] if ref1 != NO_REF else "",
+        r2=names[ref2] if ref2 != NO_REF else "",
+    )
+    return f"{names[n]} diz: '{text}'"
+
+
+def satisfies(values, statement):
+    """
+    True if the assignment values (indexable by person, True = knight) satisfies
+    the constraint of one IR statement, with the same semantics as the solvers.
+    """
+    n, op, ref1, ref2 = statement
+    s = values[n]
+    if op == PATIFE:
+        return s == (not values[ref1])
+    if op == CAVALEIRO:
+        return s == values[ref1]
+    if op == EU_DIFERENTES:
+        return s == (s != values[ref1])
+    if op == EU_IGUAIS:
+        return s == (s == values[ref1])
+    if op == SOMOS_IGUAIS:
+        return values[ref1] == (values[ref1] == values[ref2])
+    if op == SAO_IGUAIS:
+        return s == (values[ref1] == values[ref2])
+    if op == EU_CAVALEIRO:
+        return s
+    if op == EU_PATIFE:
+        return not s
+    if op == SOMOS_DIFERENTES:
+        return values[ref1] == (values[ref1] != values[ref2])
+    if op == SAO_DIFERENTES:
+        return s == (values[ref1] != values[ref2])
+    raise ValueError(f"Unknown statement op: {op}")
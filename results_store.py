@@ -0,0 +1,191 @@
+import os
+import glob
+import time
+import json
+import argparse
+import itertools
+import threading
+from datetime import datetime
+from urllib.parse import quote
+from save_results import verdict_code
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # opcional: sem pyarrow só o JSONL é gravado
+    pa = None
+
+DEFAULT_PARQUET_DIR = "resultados/parquet"
+
+
+def available():
+    return pa is not None
+
+
+def _schema():
+    """Columns of each part file; model and date are Hive partitions (model=.../date=...)."""
+    return pa.schema([
+        ("timestamp", pa.timestamp("s")),
+        ("puzzle", pa.string()),
+        ("n", pa.int32()),
+        ("pessoas", pa.list_(pa.string())),
+        ("llm", pa.list_(pa.int8())),  # códigos de save_results.VERDICTS (-1 = sem resposta)
+        ("z3", pa.list_(pa.int8())),
+        ("match", pa.bool_()),
+    ])
+
+
+def _partitioning():
+    return ds.partitioning(pa.schema([("model", pa.string()), ("date", pa.string())]), flavor="hive")
+
+
+def _columns(rows):
+    pessoas = [list(row["z3_consequencias"]) for row in rows]
+    return {
+        "timestamp": [datetime.fromisoformat(row["timestamp"]) for row in rows],
+        "puzzle": [row["puzzle"] for row in rows],
+        "n": [len(p) for p in pessoas],
+        "pessoas": pessoas,
+        "llm": [[verdict_code(row["llm"].get(x)) for x in p] for row, p in zip(rows, pessoas)],
+        "z3": [[verdict_code(row["z3_consequencias"][x]) for x in p] for row, p in zip(rows, pessoas)],
+        "match": [bool(row["match"]) for row in rows],
+    }
+
+
+_sequence = itertools.count()
+_sequence_lock = threading.Lock()
+
+
+def _part_path(root, model, date):
+    with _sequence_lock:
+        seq = next(_sequence)
+    partition = os.path.join(root, f"model={quote(model or 'desconhecido', safe='')}", f"date={date}")
+    os.makedirs(partition, exist_ok=True)
+    return os.path.join(partition, f"part-{int(time.time() * 1000)}-{os.getpid()}-{seq}.parquet")
+
+
+def write_rows(rows, root=DEFAULT_PARQUET_DIR):
+    """
+    Appends result rows (save_results records) as one new Parquet file per
+    (model, date) partition. Files appear atomically, so loaders never see
+    a partial file.
+    """
+    groups = {}
+    for row in rows:
+        groups.setdefault((row.get("model"), row["timestamp"][:10]), []).append(row)
+    for (model, date), group in groups.items():
+        path = _part_path(root, model, date)
+        pq.write_table(pa.table(_columns(group), schema=_schema()), path + ".tmp", compression="zstd")
+        os.replace(path + ".tmp", path)
+
+
+def import_jsonl(path, model, root=DEFAULT_PARQUET_DIR, batch_size=50_000):
+    """
+    Converts an existing results JSONL file. Rows without model/timestamp (older
+    records) get `model` and the file's mtime. Returns the number of rows.
+    """
+    mtime = datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec="seconds")
+    total = 0
+    batch = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            row["model"] = row.get("model") or model
+            row["timestamp"] = row.get("timestamp") or mtime
+            batch.append(row)
+            if len(batch) >= batch_size:
+                write_rows(batch, root)
+                total += len(batch)
+                batch = []
+    if batch:
+        write_rows(batch, root)
+        total += len(batch)
+    return total
+
+
+def compact(root=DEFAULT_PARQUET_DIR):
+    """Merges the part files of each partition into one (loaders then reload from scratch)."""
+    for partition in sorted(glob.glob(os.path.join(root, "model=*", "date=*"))):
+        files = sorted(glob.glob(os.path.join(partition, "*.parquet")))
+        if len(files) < 2:
+            continue
+        table = pa.concat_tables(pq.read_table(f, schema=_schema()) for f in files)
+        merged = os.path.join(partition, f"part-{int(time.time() * 1000)}-{os.getpid()}-compact.parquet")
+        pq.write_table(table, merged + ".tmp", compression="zstd")
+        os.replace(merged + ".tmp", merged)
+        for f in files:
+            os.remove(f)
+
+
+class IncrementalLoader:
+    """
+    Reads the partitioned results store, loading on each refresh() only the
+    part files it has not seen yet. Optional columns/filter (e.g.
+    ds.field("model") == "gpt-4o-mini") are pushed down to Parquet, so only the
+    needed partitions and columns are read.
+    """
+
+    def __init__(self, root=DEFAULT_PARQUET_DIR, columns=None, filter=None):
+        self.root = root
+        self.columns = columns
+        self.filter = filter
+        self.seen = set()
+        self.table = None
+
+    def _files(self):
+        return set(glob.glob(os.path.join(self.root, "model=*", "date=*", "*.parquet")))
+
+    def refresh(self):
+        """Loads the new files and returns their rows (pyarrow Table, None if nothing new)."""
+        files = self._files()
+        if self.seen - files:
+            # Arquivos sumiram (compact): recarrega tudo
+            self.seen = set()
+            self.table = None
+        new = sorted(files - self.seen)
+        if not new:
+            return None
+        schema = _schema().append(pa.field("model", pa.string())).append(pa.field("date", pa.string()))
+        dataset = ds.dataset(new, schema=schema, format="parquet",
+                             partitioning=_partitioning(), partition_base_dir=self.root)
+        rows = dataset.to_table(columns=self.columns, filter=self.filter)
+        self.seen.update(new)
+        self.table = rows if self.table is None else pa.concat_tables([self.table, rows])
+        return rows
+
+    def to_pandas(self):
+        """Every row loaded so far as a DataFrame (after a refresh)."""
+        self.refresh()
+        return self.table.to_pandas() if self.table is not None else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Armazenamento colunar (Parquet) dos resultados")
+    parser.add_argument("--root", default=DEFAULT_PARQUET_DIR, help="Pasta do dataset particionado")
+    parser.add_argument("--import-jsonl", nargs=2, metavar=("ARQUIVO", "MODELO"),
+                        help="Converte um results*.jsonl existente (modelo para linhas antigas sem 'model')")
+    parser.add_argument("--compact", action="store_true", help="Junta os arquivos de cada partição")
+    args = parser.parse_args()
+
+    if not available():
+        raise SystemExit("pyarrow não está instalado: pip install pyarrow")
+    if args.import_jsonl:
+        total = import_jsonl(*args.import_jsonl, root=args.root)
+        print(f"{total} linhas importadas para {args.root}")
+    if args.compact:
+        compact(args.root)
+        print("Partições compactadas.")
+
+    table = IncrementalLoader(args.root, columns=["model", "match"]).to_pandas()
+    if table is None:
+        print("Nenhum resultado no dataset.")
+        return
+    for model, grupo in table.groupby("model"):
+        print(f"{model}: {int(grupo['match'].sum())}/{len(grupo)} acertos")
+
+
+if __name__ == '__main__':
+    main()
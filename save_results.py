@@ -1,15 +1,22 @@
 import os
-from dotenv import load_dotenv
-import google.generativeai as genai
+import sys
+import time
+import queue
+import atexit
 import random
 import json
+import threading
+import multiprocessing.util
 from datetime import datetime
 from solverz3 import *
-from save_results import * 
+from puzzle_ir import NAME_RE
+from file_lock import FileLock
 
-def normalize_answer(text: str) -> dict:
+def normalize_answer(text: str, names=None) -> dict:
     """
     Extrai apenas linhas no formato 'A: Cavaleiro' em dict: {"A": "cavaleiro"}
+    Aceita identificadores com vários caracteres (AA, P12, ...). Se names for
+    informado, apenas essas pessoas são extraídas.
     """
     result = {}
     for line in text.splitlines():
@@ -18,11 +25,35 @@ def normalize_answer(text: str) -> dict:
             person = left.strip().upper()
             status = right.strip().lower()
 
-            if len(person) == 1 and person.isalpha():
+            if names is not None:
+                if person in names:
+                    result[person] = status
+            elif len(person) == 1 and person.isalpha():
+                result[person] = status
+            elif person == left.strip() and NAME_RE.fullmatch(person):
+                # Nomes longos só em maiúsculas, para não confundir com "Resposta: ..."
                 result[person] = status
     return result
 
 
+# Vereditos como inteiros pequenos (colunas Parquet, pontuação vetorizada)
+VERDICTS = ("patife", "cavaleiro", "indeterminado", "inconsistente")
+NO_VERDICT = -1
+# Mesma prioridade de compare_results: "cavaleiro" antes de "patife"
+_VERDICT_PRIORITY = ("cavaleiro", "patife", "indeterminado", "inconsistente")
+
+
+def verdict_code(status) -> int:
+    """Code of a Z3 status or LLM answer ('Cavaleiro (necessariamente ...)', 'patife', ...); -1 if none."""
+    if not status:
+        return NO_VERDICT
+    status = status.lower()
+    for verdict in _VERDICT_PRIORITY:
+        if verdict in status:
+            return VERDICTS.index(verdict)
+    return NO_VERDICT
+
+
 def compare_results(llm_answer: str, z3_consequencias: dict) -> bool:
     """
     Compara apenas o que é garantido pelo Z3:
@@ -30,7 +61,7 @@ def compare_results(llm_answer: str, z3_consequencias: dict) -> bool:
     - Se Z3 diz 'Patife', LLM deve dizer 'patife'
     - Se Z3 diz 'Indeterminado', ignoramos (não conta como erro)
     """
-    llm_dict = normalize_answer(llm_answer)
+    llm_dict = normalize_answer(llm_answer, z3_consequencias)
 
     for person, status in z3_consequencias.items():
         status = status.lower()
@@ -53,27 +84,203 @@ def compare_results(llm_answer: str, z3_consequencias: dict) -> bool:
 
     return True
 
+# ============================================================
+# Gravação dos resultados
+# ============================================================
+
+def _jsonl_chunk(batch):
+    return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in batch)
+
+
+def _comparacoes_chunk(batch):
+    return "".join(
+        f"{row['puzzle']} | MATCH: {row['match']}\n"
+        f"LLM: {row['llm']}\n"
+        f"Z3:  {row['z3_consequencias']}\n" + "-" * 30 + "\n"
+        for row in batch
+    )
+
+
+def _write_parquet(batch, parquet_dir):
+    import results_store
+    results_store.write_rows(batch, parquet_dir)
+
+
+def _missing_final_newline(path):
+    """True for a non-empty file whose last line was not terminated (e.g. edited by hand)."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+
+class ResultsSink:
+    """
+    Buffered writer for results.jsonl / comparacoes.txt. write() only enqueues
+    the record; a single writer thread keeps both files open, appends in batches
+    (each batch under a file lock, so lines from other threads or processes
+    never interleave) and flushes + fsyncs at least every flush_interval seconds.
+    With parquet_dir, each batch also goes to the columnar store (results_store).
+    The analytics aggregates are not touched here: analytics.summary() catches
+    up with the new lines when it is read.
+    Each destination of a batch (the two files, the Parquet store) is written
+    on its own: a failure is counted in `failed` (destination -> records not
+    written there) and its error is raised by the next flush(); the writer
+    thread keeps running.
+    """
+
+    def __init__(self, results_path="resultados/results.jsonl",
+                 comparacoes_path="resultados/comparacoes.txt",
+                 flush_interval=1.0, batch_size=5000, fsync=True, parquet_dir=None):
+        self.results_path = results_path
+        self.parquet_dir = parquet_dir
+        self.comparacoes_path = comparacoes_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self._queue = queue.Queue()
+        self._error = None
+        self.failed = {}
+        # (caminho, arquivo, lock, formato do trecho gravado)
+        self._files = []
+        for path, chunk in ((results_path, _jsonl_chunk), (comparacoes_path, _comparacoes_chunk)):
+            if path:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                f = open(path, "a", encoding="utf-8")
+                if _missing_final_newline(path):
+                    f.write("\n")
+                self._files.append((path, f, FileLock(path), chunk))
+        self._writer = threading.Thread(target=self._run, name="results-sink", daemon=True)
+        self._writer.start()
+
+    def write(self, row):
+        """Queues a record (dict with puzzle, llm, z3_consequencias, match, model, timestamp)."""
+        self._queue.put(row)
+
+    def flush(self):
+        """Blocks until every record queued so far is written; re-raises the last write error."""
+        done = threading.Event()
+        self._queue.put(done)
+        while not done.wait(0.5):
+            if not self._writer.is_alive():
+                raise RuntimeError("The results writer thread is not running.")
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+    def _run(self):
+        batch = []
+        closing = False
+        while not closing:
+            waiters = []
+            deadline = time.monotonic() + self.flush_interval
+            # Junta registros até encher o lote, vencer o intervalo ou alguém pedir flush
+            while len(batch) < self.batch_size and not waiters:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+            if batch:
+                self._write_batch(batch)
+                batch = []
+            for waiter in waiters:
+                waiter.set()
+        for _, f, lock, _ in self._files:
+            f.close()
+            lock.close()
+
+    def _attempt(self, destination, batch, write):
+        try:
+            write()
+        except Exception as e:
+            # Só este destino fica sem o lote; o writer segue vivo e flush() repassa o erro
+            print(f"Erro: {len(batch)} resultados não gravados em {destination} ({e!r})", file=sys.stderr)
+            self.failed[destination] = self.failed.get(destination, 0) + len(batch)
+            self._error = e
+
+    def _append(self, f, lock, chunk):
+        with lock:
+            f.write(chunk)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def _write_batch(self, batch):
+        for path, f, lock, chunk in self._files:
+            self._attempt(path, batch, lambda: self._append(f, lock, chunk(batch)))
+        if self.parquet_dir:
+            self._attempt(self.parquet_dir, batch, lambda: _write_parquet(batch, self.parquet_dir))
+
+
+_sinks = {}
+_sinks_lock = threading.Lock()
+
+
+def _parquet_dir():
+    """RESULTS_PARQUET_DIR (default resultados/parquet; empty = off), if pyarrow is installed."""
+    parquet_dir = os.getenv("RESULTS_PARQUET_DIR", "resultados/parquet")
+    if not parquet_dir:
+        return None
+    import results_store
+    return parquet_dir if results_store.available() else None
+
+
+def get_sink(results_path="resultados/results.jsonl", comparacoes_path="resultados/comparacoes.txt"):
+    """Process-wide sink for a pair of files (closed, i.e. flushed, at exit)."""
+    key = (results_path, comparacoes_path)
+    with _sinks_lock:
+        if key not in _sinks:
+            if not _sinks:
+                # Processos do multiprocessing saem sem rodar o atexit
+                multiprocessing.util.Finalize(None, close_sinks, exitpriority=10)
+            _sinks[key] = ResultsSink(results_path, comparacoes_path, parquet_dir=_parquet_dir())
+        return _sinks[key]
+
+
+def _reset_sinks():
+    """After fork: the parent's writer threads do not exist in the child."""
+    global _sinks, _sinks_lock
+    _sinks = {}
+    _sinks_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_sinks)
+
+
+@atexit.register
+def close_sinks():
+    with _sinks_lock:
+        for sink in _sinks.values():
+            sink.close()
+        _sinks.clear()
+
+
 def salva_comparacao(puzzle_name, puzzle_text, llm_answer, z3_consequencias, match,
                      results_path="resultados/results.jsonl",
-                     comparacoes_path="resultados/comparacoes.txt"):
-    for path in {results_path, comparacoes_path}:
-        dir_path = os.path.dirname(path) or "."
-        os.makedirs(dir_path, exist_ok=True)
- 
-    short_llm = normalize_answer(llm_answer)
-
-    # JSONL curto
-    with open(results_path, "a", encoding="utf-8") as jf:
-        jf.write(json.dumps({
-            "puzzle": puzzle_name,
-            "llm": short_llm,
-            "z3_consequencias": z3_consequencias,
-            "match": match
-        }, ensure_ascii=False) + "\n")
-
-    # TXT curto
-    with open(comparacoes_path, "a", encoding="utf-8") as f:
-        f.write(f"{puzzle_name} | MATCH: {match}\n")
-        f.write(f"LLM: {short_llm}\n")
-        f.write(f"Z3:  {z3_consequencias}\n")
-        f.write("-" * 30 + "\n")
+                     comparacoes_path="resultados/comparacoes.txt", model=None):
+    short_llm = normalize_answer(llm_answer, z3_consequencias)
+
+    # JSONL curto + TXT curto, via o sink (escrita em lote, sem abrir os arquivos a cada registro)
+    get_sink(results_path, comparacoes_path).write({
+        "puzzle": puzzle_name,
+        "llm": short_llm,
+        "z3_consequencias": z3_consequencias,
+        "match": match,
+        "model": model,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+    })
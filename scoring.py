@@ -0,0 +1,160 @@
+import sys
+import json
+import time
+import argparse
+from typing import NamedTuple
+import numpy as np
+from save_results import VERDICTS, NO_VERDICT, verdict_code
+
+PATIFE, CAVALEIRO, INDETERMINADO, INCONSISTENTE = range(len(VERDICTS))
+
+
+def exact_code(answer) -> int:
+    """LLM answer code as compare_results reads it: only the exact word counts ('cavaleiro', ...)."""
+    answer = (answer or "").strip()
+    return VERDICTS.index(answer) if answer in VERDICTS else NO_VERDICT
+
+
+class EncodedResults(NamedTuple):
+    """
+    Result rows as flat per-person arrays: z3[i]/llm[i] are the verdict codes
+    (save_results.VERDICTS, -1 = none) of person i, who belongs to row[i].
+    model[r] indexes model_names for each result row r.
+    """
+    z3: np.ndarray
+    llm: np.ndarray
+    row: np.ndarray
+    model: np.ndarray
+    model_names: list
+
+
+def _encode_strings(values, code):
+    """Codes of many strings with one code() call per distinct string."""
+    memo = {}
+    for value in set(values):
+        memo[value] = code(value)
+    return np.fromiter(map(memo.__getitem__, values), dtype=np.int8, count=len(values))
+
+
+def encode_rows(rows, default_model="desconhecido", exact=True):
+    """
+    Encodes result rows (save_results records). exact=True reads the LLM answers
+    like compare_results (exact word); exact=False uses verdict_code (substring).
+    """
+    z3_txt, llm_txt, sizes, models = [], [], [], []
+    for r in rows:
+        z3, llm = r["z3_consequencias"], r.get("llm") or {}
+        z3_txt.extend(z3.values())
+        llm_txt.extend(llm.get(p) or "" for p in z3)
+        sizes.append(len(z3))
+        models.append(r.get("model") or default_model)
+    model_names = sorted(set(models))
+    index = {name: i for i, name in enumerate(model_names)}
+    return EncodedResults(
+        z3=_encode_strings(z3_txt, verdict_code),
+        llm=_encode_strings(llm_txt, exact_code if exact else verdict_code),
+        row=np.repeat(np.arange(len(sizes), dtype=np.int32), sizes),
+        model=np.fromiter(map(index.__getitem__, models), dtype=np.int32, count=len(models)),
+        model_names=model_names,
+    )
+
+
+def encode_jsonl(paths, exact=True):
+    """Encodes results*.jsonl files (old rows without 'model' get the file's analytics label)."""
+    from analytics import RESULT_FILES
+    rows = []
+    for path in paths:
+        default_model = RESULT_FILES.get(path, path)
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    row.setdefault("model", default_model)
+                    rows.append(row)
+    return encode_rows(rows, exact=exact)
+
+
+def encode_table(table):
+    """
+    Encodes a results_store (Parquet) table, reusing its stored codes. Those
+    were computed with verdict_code, i.e. the lenient (substring) reading.
+    """
+    import pyarrow.compute as pc
+    models = pc.dictionary_encode(table["model"]).combine_chunks()
+    return EncodedResults(
+        z3=pc.list_flatten(table["z3"]).to_numpy().astype(np.int8),
+        llm=pc.list_flatten(table["llm"]).to_numpy().astype(np.int8),
+        row=pc.list_parent_indices(table["z3"]).to_numpy().astype(np.int32),
+        model=models.indices.to_numpy().astype(np.int32),
+        model_names=models.dictionary.to_pylist(),
+    )
+
+
+def puzzle_correct(enc, skip_undetermined=False, inconsistent_as=INDETERMINADO):
+    """
+    Per-row match (bool array) and per-person correctness under the scoring
+    rules. Defaults are compare_results': an inconsistent puzzle expects
+    'indeterminado', and undetermined people are scored too.
+    """
+    expected = np.where(enc.z3 == INCONSISTENTE, inconsistent_as, enc.z3)
+    correct = enc.llm == expected
+    counted = enc.z3 != INDETERMINADO if skip_undetermined else np.ones_like(correct)
+    wrong = np.bincount(enc.row[counted & ~correct], minlength=len(enc.model))
+    return wrong == 0, correct, counted
+
+
+def score(enc, **rules):
+    """Per-model puzzle and per-person accuracy (rules: see puzzle_correct)."""
+    match, correct, counted = puzzle_correct(enc, **rules)
+    n_models = len(enc.model_names)
+    puzzles = np.bincount(enc.model, minlength=n_models)
+    acertos = np.bincount(enc.model, weights=match, minlength=n_models)
+    person_model = enc.model[enc.row][counted]
+    pessoas = np.bincount(person_model, minlength=n_models)
+    pessoas_ok = np.bincount(person_model, weights=correct[counted], minlength=n_models)
+
+    resumo = {}
+    for i, name in enumerate(enc.model_names):
+        resumo[name] = {
+            "puzzles": int(puzzles[i]),
+            "acertos": int(acertos[i]),
+            "acuracia_puzzle": float(acertos[i] / puzzles[i]) if puzzles[i] else 0.0,
+            "pessoas": int(pessoas[i]),
+            "acuracia_pessoa": float(pessoas_ok[i] / pessoas[i]) if pessoas[i] else 0.0,
+        }
+    return resumo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pontua em lote as respostas das LLMs contra o gabarito do Z3")
+    parser.add_argument("files", nargs="*", default=["resultados/results.jsonl", "resultados/results_gpt.jsonl"],
+                        help="Arquivos results*.jsonl")
+    parser.add_argument("--parquet", metavar="PASTA", help="Lê do armazenamento Parquet (results_store) em vez do JSONL")
+    parser.add_argument("--lenient", action="store_true", help="Aceita o veredito contido na resposta (não só a palavra exata)")
+    parser.add_argument("--skip-undetermined", action="store_true", help="Não cobra as pessoas indeterminadas")
+    parser.add_argument("--inconsistent-as", choices=VERDICTS, default="indeterminado",
+                        help="Resposta esperada para puzzles inconsistentes")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.parquet:
+        from results_store import IncrementalLoader
+        loader = IncrementalLoader(args.parquet, columns=["model", "z3", "llm"])
+        if loader.refresh() is None:
+            sys.exit("Nenhum resultado no dataset.")
+        enc = encode_table(loader.table)
+    else:
+        enc = encode_jsonl(args.files, exact=not args.lenient)
+    loaded = time.perf_counter()
+    resumo = score(enc, skip_undetermined=args.skip_undetermined,
+                   inconsistent_as=VERDICTS.index(args.inconsistent_as))
+    scored = time.perf_counter()
+
+    for model, dados in resumo.items():
+        print(f"{model}: {dados['acertos']}/{dados['puzzles']} puzzles ({dados['acuracia_puzzle']:.1%}), "
+              f"{dados['acuracia_pessoa']:.1%} das pessoas")
+    print(f"{len(enc.model)} resultados carregados em {loaded - start:.3f}s, pontuados em {scored - loaded:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
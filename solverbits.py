@@ -0,0 +1,110 @@
+import numpy as np
+from puzzle_ir import (parse_puzzle, PATIFE, CAVALEIRO, EU_DIFERENTES, EU_IGUAIS, SOMOS_IGUAIS,
+                       SAO_IGUAIS, EU_CAVALEIRO, EU_PATIFE, SOMOS_DIFERENTES, SAO_DIFERENTES)
+
+# 2^n assignments are enumerated at once, so n is kept well below uint32 limits
+MAX_BITS_N = 24
+
+
+def parse_puzzle_to_bits(puzzle_text):
+    """
+    Parses a Knights and Knaves puzzle for the bitset backend.
+    Returns a tuple (variables, restrictions) like parse_puzzle_to_z3, where
+    variables maps name -> bit index and restrictions are the IR statements.
+    """
+    return build_bits(parse_puzzle(puzzle_text))
+
+
+def build_bits(ir):
+    """Maps a parsed PuzzleIR to the bitset backend (name -> bit index)."""
+    if len(ir.names) > MAX_BITS_N:
+        raise ValueError(f"Bitset backend supports at most {MAX_BITS_N} people (got {len(ir.names)}).")
+
+    variables = {n: i for i, n in enumerate(ir.names)}
+    return variables, ir.statements
+
+
+def _statement_mask(bit, statement):
+    """Evaluates one IR statement over every assignment: True where it is consistent."""
+    n, op, ref1, ref2 = statement
+    if op == PATIFE:
+        return bit(n) == ~bit(ref1)
+    if op == CAVALEIRO:
+        return bit(n) == bit(ref1)
+    if op == EU_DIFERENTES:
+        return bit(n) == (bit(n) != bit(ref1))
+    if op == EU_IGUAIS:
+        return bit(n) == (bit(n) == bit(ref1))
+    if op == SOMOS_IGUAIS:
+        return bit(ref1) == (bit(ref1) == bit(ref2))
+    if op == SAO_IGUAIS:
+        return bit(n) == (bit(ref1) == bit(ref2))
+    if op == EU_CAVALEIRO:
+        return bit(n)
+    if op == EU_PATIFE:
+        return ~bit(n)
+    if op == SOMOS_DIFERENTES:
+        return bit(ref1) == (bit(ref1) != bit(ref2))
+    if op == SAO_DIFERENTES:
+        return bit(n) == (bit(ref1) != bit(ref2))
+    raise ValueError(f"Unknown statement op: {op}")
+
+
+def solve_bits(variables, restrictions):
+    """
+    Enumerates all 2^n assignments (bit i of the index = person i is a knight)
+    and filters them through every statement in one vectorised pass.
+    Returns a tuple (models, always_true, maybe_true): the consistent assignment
+    indices as uint32 and two bitmasks with the people that are knights in
+    every model and in at least one model. len(models) is the model count.
+    """
+    assignments = np.arange(1 << len(variables), dtype=np.uint32)
+    bits = {}
+
+    def bit(i):
+        if i not in bits:
+            bits[i] = ((assignments >> np.uint32(i)) & np.uint32(1)).astype(bool)
+        return bits[i]
+
+    consistent = np.ones(assignments.shape, dtype=bool)
+    for statement in restrictions:
+        consistent &= _statement_mask(bit, statement)
+
+    models = assignments[consistent]
+    if not len(models):
+        return models, 0, 0
+    always_true = int(np.bitwise_and.reduce(models))
+    maybe_true = int(np.bitwise_or.reduce(models))
+    return models, always_true, maybe_true
+
+
+def generic_solver(variables, restrictions):
+    """
+    variables: dict with name -> bit index (see parse_puzzle_to_bits)
+    restrictions: IR statements (see puzzle_ir.PuzzleIR)
+    """
+    models, _, _ = solve_bits(variables, restrictions)
+    if not len(models):
+        return "Inconsistente (sem solução)"
+    first = int(models[0])
+    return {name: bool(first >> i & 1) for name, i in variables.items()}
+
+
+def logical_consequences(variables, restrictions):
+    """
+    Same contract as solverz3.logical_consequences, computed from the backbone
+    of the enumerated models.
+    """
+    models, always_true, maybe_true = solve_bits(variables, restrictions)
+    if not len(models):
+        return {name: "Inconsistente (sem modelo possível)" for name in variables}
+
+    results = {}
+    for name, i in variables.items():
+        if always_true >> i & 1:
+            results[name] = "Cavaleiro (necessariamente verdadeiro)"
+        elif not maybe_true >> i & 1:
+            results[name] = "Patife (necessariamente falso)"
+        else:
+            results[name] = "Indeterminado (pode ser ambos)"
+    return results
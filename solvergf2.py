@@ -0,0 +1,323 @@
+from typing import NamedTuple
+from puzzle_ir import (parse_puzzle, PATIFE, CAVALEIRO, EU_DIFERENTES, EU_IGUAIS, SOMOS_IGUAIS,
+                       SAO_IGUAIS, EU_CAVALEIRO, EU_PATIFE, SOMOS_DIFERENTES, SAO_DIFERENTES)
+
+
+def parse_puzzle_to_gf2(puzzle_text):
+    """
+    Parses a Knights and Knaves puzzle for the GF(2) backend.
+    Returns a tuple (variables, restrictions) like parse_puzzle_to_z3, where
+    variables maps name -> person index and restrictions are the IR statements.
+    """
+    return build_gf2(parse_puzzle(puzzle_text))
+
+
+def build_gf2(ir):
+    """Maps a parsed PuzzleIR to the GF(2) backend (name -> person index)."""
+    variables = {n: i for i, n in enumerate(ir.names)}
+    return variables, ir.statements
+
+
+def statement_equation(statement):
+    """
+    The constraint of one IR statement as a GF(2) equation (x = 1: knight).
+    Every form is affine: returns (people, c) meaning XOR of people == c.
+    E.g. "X é um patife" is s = not x, i.e. s ^ x = 1, and "X e eu somos iguais"
+    (s == (s == x)) holds exactly when x = 1, whatever s is.
+    """
+    n, op, ref1, ref2 = statement
+    if op == PATIFE:
+        return (n, ref1), 1
+    if op == CAVALEIRO:
+        return (n, ref1), 0
+    if op == EU_DIFERENTES:
+        return (ref1,), 0
+    if op == EU_IGUAIS:
+        return (ref1,), 1
+    if op == SOMOS_IGUAIS:
+        return (ref2,), 1
+    if op == SAO_IGUAIS:
+        return (n, ref1, ref2), 1
+    if op == EU_CAVALEIRO:
+        return (n,), 1
+    if op == EU_PATIFE:
+        return (n,), 0
+    if op == SOMOS_DIFERENTES:
+        return (ref2,), 0
+    if op == SAO_DIFERENTES:
+        return (n, ref1, ref2), 0
+    raise ValueError(f"Unknown statement op: {op}")
+
+
+class GF2Solution(NamedTuple):
+    """
+    Result of solve_gf2. witness: one model (bool per person, empty when
+    inconsistent); forced: True/False for people with the same value in every
+    model, None for the undetermined; free: the solution count is 2 ** free.
+    """
+    consistent: bool
+    witness: list
+    forced: list
+    free: int
+
+    @property
+    def solutions(self):
+        return 2 ** self.free if self.consistent else 0
+
+
+class _Parity:
+    """Union-find with the parity of each person relative to its root (x = x_root ^ parity)."""
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.parity = [0] * n
+        self.size = [1] * n
+
+    def find(self, x):
+        parent = self.parent
+        if parent[x] == x:
+            return x
+        path = []
+        while parent[x] != x:
+            path.append(x)
+            x = parent[x]
+        # Compressão de caminho: cada nó do caminho passa a apontar para a raiz
+        parity = self.parity
+        acc = 0
+        for node in reversed(path):
+            acc ^= parity[node]
+            parity[node] = acc
+            parent[node] = x
+        return x
+
+    def union(self, a, b, c):
+        """Adds x_a ^ x_b = c; returns False if it contradicts what is already known."""
+        ra, rb = self.find(a), self.find(b)
+        # A paridade de uma raiz é sempre 0
+        pa, pb = self.parity[a], self.parity[b]
+        if ra == rb:
+            return pa ^ pb == c
+        # União por tamanho: a árvore menor fica embaixo
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.parity[rb] = pa ^ pb ^ c
+        self.size[ra] += self.size[rb]
+        return True
+
+
+def solve_gf2(variables, restrictions):
+    """
+    Solves the puzzle as a linear system over GF(2) in polynomial time.
+
+    Presolve: one- and two-person equations (x = c, x ^ y = c) go into a parity
+    union-find, where a constant is an extra node fixed to 0, and three-person
+    equations are re-reduced over the class representatives until none shrinks.
+    Only the rows left with three classes are packed into bitset rows (Python
+    ints, bit 0 = constant) for Gaussian elimination. The reduced echelon form
+    gives consistency, the rank (free = classes - rank), a witness by back
+    substitution and the exact backbone: a class is forced iff its pivot row
+    has no free column left.
+    """
+    n = len(variables)
+    zero = n  # nó extra com valor 0: "x = c" vira "x ^ zero = c"
+    uf = _Parity(n + 1)
+
+    def reduce(people, c):
+        """Equation over the current class representatives, without the constant class."""
+        terms = set()
+        zero_root = uf.find(zero)
+        for x in people:
+            root = uf.find(x)
+            c ^= uf.parity[x]
+            if root == zero_root:
+                c ^= uf.parity[zero]
+            else:
+                terms ^= {root}
+        return tuple(terms), c
+
+    pending = [statement_equation(s) for s in restrictions]
+    shrunk = True
+    while shrunk:
+        shrunk = False
+        rows = []
+        for people, c in pending:
+            people, c = reduce(people, c)
+            if len(people) > 2:
+                rows.append((people, c))
+                continue
+            shrunk = True
+            if not people:
+                consistent = c == 0
+            elif len(people) == 1:
+                consistent = uf.union(people[0], zero, c)
+            else:
+                consistent = uf.union(people[0], people[1], c)
+            if not consistent:
+                return GF2Solution(False, [], [], 0)
+        pending = rows
+
+    roots = [uf.find(x) for x in range(n + 1)]
+    parity = uf.parity
+    column = {}
+    for people, _ in pending:
+        for root in people:
+            if root not in column:
+                column[root] = len(column) + 1  # bit 0 é a constante
+
+    # Eliminação: o pivô é a coluna mais baixa da linha, que só contém colunas maiores
+    pivots = {}
+    for people, c in pending:
+        row = c
+        for root in people:
+            row ^= 1 << column[root]
+        while row > 1:
+            cols = row >> 1
+            low = (cols & -cols).bit_length()
+            pivot = pivots.get(low)
+            if pivot is None:
+                pivots[low] = row
+                break
+            row ^= pivot
+        else:
+            if row:  # 0 = 1
+                return GF2Solution(False, [], [], 0)
+
+    # Forma escalonada reduzida, dos pivôs mais altos para os mais baixos
+    for low in sorted(pivots, reverse=True):
+        row = pivots[low]
+        # Linhas acima já reduzidas só trazem colunas livres, nunca novos pivôs
+        rest = row >> (low + 1) << (low + 1)
+        while rest:
+            bit = (rest & -rest).bit_length() - 1
+            if bit in pivots:
+                row ^= pivots[bit]
+            rest &= rest - 1
+        pivots[low] = row
+
+    # Valor e determinação de cada classe; livres valem 0 na testemunha
+    zero_root = roots[zero]
+    values = {zero_root: parity[zero]}
+    forced_roots = {zero_root}
+    for root, col in column.items():
+        row = pivots.get(col)
+        if row is not None:
+            values[root] = row & 1
+            if row >> 1 == 1 << (col - 1):
+                forced_roots.add(root)
+
+    witness, forced = [], []
+    for x in range(n):
+        value = bool(values.get(roots[x], 0) ^ parity[x])
+        witness.append(value)
+        forced.append(value if roots[x] in forced_roots else None)
+    classes = len(set(roots[:n]) - {zero_root})
+    return GF2Solution(True, witness, forced, classes - len(pivots))
+
+
+def _bits(x):
+    while x:
+        low = x & -x
+        yield low.bit_length() - 1
+        x ^= low
+
+
+class EchelonBasis:
+    """
+    Reduced row echelon form of the equations added so far, kept up to date
+    one equation at a time (rows are int bitsets, bit i = person i). Constants
+    are left out: for a satisfiable system they do not change which people are
+    forced, only their values. effect() tells what an equation would change
+    without adding it, so generators can pick statements by their effect.
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.rows = {}    # pivô -> linha (o pivô e apenas colunas livres)
+        self.users = {}   # coluna livre -> pivôs das linhas que a contêm
+        self.forced = set()
+
+    @property
+    def free(self):
+        """Solutions are 2 ** free (while the system stays satisfiable)."""
+        return self.n - len(self.rows)
+
+    def _reduce(self, people):
+        row = 0
+        for x in people:
+            row ^= 1 << x
+        # Linhas reduzidas só trazem colunas livres: basta zerar os pivôs da linha original
+        for bit in list(_bits(row)):
+            if bit in self.rows:
+                row ^= self.rows[bit]
+        return row
+
+    def effect(self, people):
+        """(independent, forced): whether XOR of people is a new equation and the people it would newly force."""
+        row = self._reduce(people)
+        if not row:
+            return False, set()
+        pivot = (row & -row).bit_length() - 1
+        forced = {pivot} if row == 1 << pivot else set()
+        for other in self.users.get(pivot, ()):
+            if self.rows[other] ^ row == 1 << other:
+                forced.add(other)
+        return True, forced
+
+    def add(self, people):
+        """Adds the equation XOR of people (= some constant); returns False if it was redundant."""
+        row = self._reduce(people)
+        if not row:
+            return False
+        pivot = (row & -row).bit_length() - 1
+        rest = row ^ (1 << pivot)
+        # O novo pivô sai das linhas que o continham (forma reduzida)
+        for other in self.users.pop(pivot, ()):
+            self.rows[other] ^= row
+            for col in _bits(rest):
+                members = self.users.setdefault(col, set())
+                members ^= {other}
+            if self.rows[other] == 1 << other:
+                self.forced.add(other)
+        self.rows[pivot] = row
+        for col in _bits(rest):
+            self.users.setdefault(col, set()).add(pivot)
+        if not rest:
+            self.forced.add(pivot)
+        return True
+
+
+def count_solutions(variables, restrictions):
+    """Exact number of consistent assignments (2 ** free, 0 if inconsistent)."""
+    return solve_gf2(variables, restrictions).solutions
+
+
+def generic_solver(variables, restrictions):
+    """
+    variables: dict with name -> person index (see parse_puzzle_to_gf2)
+    restrictions: IR statements (see puzzle_ir.PuzzleIR)
+    """
+    solution = solve_gf2(variables, restrictions)
+    if not solution.consistent:
+        return "Inconsistente (sem solução)"
+    return {name: solution.witness[i] for name, i in variables.items()}
+
+
+def logical_consequences(variables, restrictions):
+    """
+    Same contract as solverz3.logical_consequences, read from the reduced
+    echelon form instead of 2n SAT calls.
+    """
+    solution = solve_gf2(variables, restrictions)
+    if not solution.consistent:
+        return {name: "Inconsistente (sem modelo possível)" for name in variables}
+
+    results = {}
+    for name, i in variables.items():
+        if solution.forced[i] is None:
+            results[name] = "Indeterminado (pode ser ambos)"
+        elif solution.forced[i]:
+            results[name] = "Cavaleiro (necessariamente verdadeiro)"
+        else:
+            results[name] = "Patife (necessariamente falso)"
+    return results
@@ -1,5 +1,9 @@
-import re
 from z3 import * 
+from puzzle_ir import (parse_puzzle, PATIFE, CAVALEIRO, EU_DIFERENTES, EU_IGUAIS, SOMOS_IGUAIS,
+                       SAO_IGUAIS, EU_CAVALEIRO, EU_PATIFE, SOMOS_DIFERENTES, SAO_DIFERENTES)
+
+# Bump when a change to the solvers can alter their answers (invalidates caches)
+SOLVER_VERSION = 2
 
 def generic_solver(variables, restrictions):
     """
@@ -19,125 +23,152 @@ def generic_solver(variables, restrictions):
         return "Indefinido (solver não conseguiu decidir)"
     
 
+def statement_to_z3(variables, statement):
+    """
+    Builds the Z3 constraint of one IR statement (speaker, op, ref1, ref2).
+    variables: list of Z3 variables in PuzzleIR.names order
+    """
+    n, op, ref1, ref2 = statement
+    s = variables[n]
+    if op == PATIFE:
+        return s == Not(variables[ref1])
+    if op == CAVALEIRO:
+        return s == variables[ref1]
+    if op == EU_DIFERENTES:
+        return s == (s != variables[ref1])
+    if op == EU_IGUAIS:
+        return s == (s == variables[ref1])
+    if op == SOMOS_IGUAIS:
+        return variables[ref1] == (variables[ref1] == variables[ref2])
+    if op == SAO_IGUAIS:
+        return s == (variables[ref1] == variables[ref2])
+    if op == EU_CAVALEIRO:
+        return s == True
+    if op == EU_PATIFE:
+        return s == False
+    if op == SOMOS_DIFERENTES:
+        # ref1 diz que ref1 e ref2 são diferentes
+        return variables[ref1] == (variables[ref1] != variables[ref2])
+    if op == SAO_DIFERENTES:
+        return s == (variables[ref1] != variables[ref2])
+    raise ValueError(f"Unknown statement op: {op}")
+
+
 def parse_puzzle_to_z3(puzzle_text):
     """
     Parses simple Knights and Knaves puzzles (A, B, C, ...) and generates Z3 variables and constraints.
     Returns a tuple (variables, restrictions).
     """
-    # Detect all characters that speak (e.g., A, B, C)
-    names = sorted(set(re.findall(r"\b([A-Z])\s+diz:", puzzle_text)))
-    if not names:
-        raise ValueError("No characters found in the puzzle text.")
+    return build_z3(parse_puzzle(puzzle_text))
+
 
+def build_z3(ir):
+    """Creates the Z3 variables and constraints of a parsed PuzzleIR."""
     # Create Z3 boolean variables: True = knight, False = knave
-    variables = {n: Bool(n) for n in names}
-    restrictions = []
-
-    # Capture all statements in the format "X diz: '...'"
-    statements = re.findall(r"([A-Z])\s+diz:\s*'([^']+)'", puzzle_text)
-    for n, statement in statements:
-        statement = statement.strip()
-
-        # Pattern: "X é um patife"
-        m = re.match(r"([A-Z])\s+é\s+um\s+patife", statement)
-        if m:
-            ref = m.group(1)
-            restrictions.append(variables[n] == Not(variables[ref]))
-            continue
+    variables = {n: Bool(n) for n in ir.names}
+    ordered = list(variables.values())
+    restrictions = [statement_to_z3(ordered, s) for s in ir.statements]
 
-        # Pattern: "X é um cavaleiro"
-        m = re.match(r"([A-Z])\s+é\s+um\s+cavaleiro", statement)
-        if m:
-            ref = m.group(1)
-            restrictions.append(variables[n] == variables[ref])
-            continue
+    return variables, restrictions
 
-        # Pattern: "X e eu somos diferentes"
-        m = re.match(r"([A-Z])\s+e\s+eu\s+somos\s+diferentes", statement)
-        if m:
-            ref = m.group(1)
-            restrictions.append(variables[n] == (variables[n] != variables[ref]))
-            continue
 
-        # Pattern: "X e eu somos iguais"
-        m = re.match(r"([A-Z])\s+e\s+eu\s+somos\s+iguais", statement)
-        if m:
-            ref = m.group(1)
-            restrictions.append(variables[n] == (variables[n] == variables[ref]))
-            continue
 
-        # Pattern: "X e eu somos iguais"
-        m = re.match(r"([A-Z])\s+e\s+([A-Z])\s+somos\s+iguais", statement)
-        if m:
-            ref1, ref2 = m.group(1), m.group(2)
-            restrictions.append(variables[ref1] == (variables[ref1] == variables[ref2]))
-            continue
+def logical_consequences(variables, restrictions):
+    """
+    Check which variables (people) have their value logically determined
+    by the puzzle constraints.
+    Returns a dict: { 'A': 'Knight' | 'Scoundrel' | 'Undetermined' }
 
-        # Pattern: "X e Y são iguais"
-        m = re.match(r"([A-Z])\s+e\s+([A-Z])\s+são\s+iguais", statement)
-        if m:
-            ref1, ref2 = m.group(1), m.group(2)
-            restrictions.append(variables[n] == (variables[ref1] == variables[ref2]))
-            continue
+    Backbone mode: one solver loads the restrictions once and finds a first
+    model. For each person only the flipped value is tested, via
+    check(assumptions), and every extra model found marks as undetermined
+    all people whose value differs from the first model, so they are skipped.
+    """
+    solver = Solver()
+    solver.add(restrictions)
 
-        # Pattern: "Eu sou um cavaleiro"
-        if re.match(r"Eu sou um cavaleiro", statement):
-            restrictions.append(variables[n] == True)
-            continue
+    if solver.check() != sat:
+        return {name: "Inconsistente (sem modelo possível)" for name in variables}
 
-        # Pattern: "Eu sou um patife"
-        if re.match(r"Eu sou um patife", statement):
-            restrictions.append(variables[n] == False)
-            continue
+    model = solver.model()
+    first = {name: is_true(model.eval(var, model_completion=True))
+             for name, var in variables.items()}
+    undetermined = set()
+    items = list(variables.items())
 
-        # Pattern: "X e Y são diferentes" (X != Y)
-        m = re.match(r"([A-Z])\s+e\s+([A-Z])\s+somos\s+diferentes", statement)
-        if m:
-            ref1, ref2 = m.group(1), m.group(2)
-            # ref1 diz que ref1 e ref2 são diferentes
-            restrictions.append(variables[ref1] == (variables[ref1] != variables[ref2]))
+    for pos, (name, var) in enumerate(items):
+        if name in undetermined:
             continue
 
-        # Pattern: "X e Y são diferentes"
-        m = re.match(r"([A-Z])\s+e\s+([A-Z])\s+são\s+diferentes", statement)
-        if m:
-            ref1, ref2 = m.group(1), m.group(2)
-            restrictions.append(variables[n] == (variables[ref1] != variables[ref2]))
-            continue
+        # Testa o valor oposto ao do primeiro modelo
+        flipped = Not(var) if first[name] else var
+        if solver.check(flipped) == sat:
+            undetermined.add(name)
+            other = solver.model()
+            # Quem já foi testado não muda entre modelos: só os pendentes são avaliados
+            for other_name, other_var in items[pos + 1:]:
+                if other_name not in undetermined and \
+                        is_true(other.eval(other_var, model_completion=True)) != first[other_name]:
+                    undetermined.add(other_name)
 
-    if not restrictions:
-        raise ValueError("No recognizable constraints found in the puzzle.")
-
-    return variables, restrictions
+    results = {}
+    for name in variables:
+        if name in undetermined:
+            results[name] = "Indeterminado (pode ser ambos)"
+        elif first[name]:
+            results[name] = "Cavaleiro (necessariamente verdadeiro)"
+        else:
+            results[name] = "Patife (necessariamente falso)"
 
+    return results
 
 
-def logical_consequences(variables, restrictions):
+def iter_solutions(variables, restrictions, project=None):
     """
-    Check which variables (people) have their value logically determined
-    by the puzzle constraints.
-    Returns a dict: { 'A': 'Knight' | 'Scoundrel' | 'Undetermined' }
+    Lazily yields every consistent assignment as {name: bool}.
+    One solver holds the restrictions and each model found is excluded with a
+    blocking clause on that same solver, so the next one costs a single
+    incremental check. project: names to enumerate on (default everyone);
+    assignments that only differ outside it are yielded once.
     """
-    results = {}
-    
-    for name, var in variables.items():
-        s1 = Solver()
-        s1.add(restrictions)
-        s1.add(Not(var))  # Testa se pode ser falso
-        can_be_false = (s1.check() == sat)
-        
-        s2 = Solver()
-        s2.add(restrictions)
-        s2.add(var)  # Testa se pode ser verdadeiro
-        can_be_true = (s2.check() == sat)
-        
-        if can_be_true and not can_be_false:
-            results[name] = "Cavaleiro (necessariamente verdadeiro)"
-        elif can_be_false and not can_be_true:
-            results[name] = "Patife (necessariamente falso)"
-        elif can_be_true and can_be_false:
-            results[name] = "Indeterminado (pode ser ambos)"
-        else:
-            results[name] = "Inconsistente (sem modelo possível)"
-    
-    return results
+    names = list(project) if project is not None else list(variables)
+    chosen = [variables[name] for name in names]
+    # Lógica de domínio finito: o Z3 usa direto o núcleo SAT incremental,
+    # bem mais rápido que o Solver() genérico para muitos check() seguidos
+    solver = SolverFor("QF_FD")
+    solver.add(restrictions)
+    if not chosen:
+        if solver.check() == sat:
+            yield {}
+        return
+
+    # Literais prontos e chamadas diretas à API C: montar BoolRefs e avaliar
+    # com model.eval a cada modelo custa mais que o próprio check()
+    ctx = solver.ctx
+    negated = [Not(var) for var in chosen]
+    pos_asts = [var.as_ast() for var in chosen]
+    neg_asts = [lit.as_ast() for lit in negated]
+    result = (Ast * 1)()
+    clause = (Ast * len(chosen))()
+    while solver.check() == sat:
+        model = solver.model()
+        values = []
+        for i, ast in enumerate(pos_asts):
+            Z3_model_eval(ctx.ref(), model.model, ast, True, result)
+            value = Z3_get_bool_value(ctx.ref(), result[0]) == Z3_L_TRUE
+            values.append(value)
+            clause[i] = neg_asts[i] if value else ast
+        yield dict(zip(names, values))
+        # Cláusula de bloqueio: pelo menos uma pessoa muda de valor
+        solver.add(BoolRef(Z3_mk_or(ctx.ref(), len(chosen), clause), ctx))
+
+
+def count_solutions(variables, restrictions, cap=None, project=None):
+    """Exact number of consistent assignments (on project, if given), stopping at cap."""
+    count = 0
+    for _ in iter_solutions(variables, restrictions, project):
+        count += 1
+        if cap is not None and count >= cap:
+            break
+    return count
+
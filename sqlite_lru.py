@@ -0,0 +1,19 @@
+# Fração de max_entries liberada de uma vez quando um cache passa do limite
+EVICT_FRACTION = 0.1
+
+
+def evict_lru(db, table, max_entries):
+    """
+    Deletes the least recently used rows of table (by its indexed last_used
+    column) down to max_entries minus EVICT_FRACTION, if it holds more than
+    max_entries, so eviction runs once per batch of inserts instead of on every
+    write. Rows are counted here, since other processes may share the file.
+    Returns the number of rows left.
+    """
+    count = db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    if count <= max_entries:
+        return count
+    target = max_entries - int(max_entries * EVICT_FRACTION)
+    db.execute(f"DELETE FROM {table} WHERE key IN (SELECT key FROM {table} ORDER BY last_used LIMIT ?)",
+               (count - target,))
+    return target
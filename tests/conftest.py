@@ -0,0 +1,25 @@
+import random
+import pytest
+from packed_corpus import PackedWriter
+from puzzle import sample_puzzle_ir
+
+
+@pytest.fixture
+def make_irs():
+    """make_irs(count, seed, max_n=30, prefix=None, dense=False): seeded random puzzles (density 1-2 if dense)."""
+    def make(count, seed, max_n=30, prefix=None, dense=False):
+        rng = random.Random(seed)
+        return [sample_puzzle_ir(rng.randint(2, max_n), prefix=prefix,
+                                 density=rng.randint(1, 2) if dense else 1, rng=rng)
+                for _ in range(count)]
+    return make
+
+
+@pytest.fixture
+def write_packed():
+    """write_packed(path, irs): packs irs into a corpus labelled puzzle1.txt, puzzle2.txt, ..."""
+    def write(path, irs):
+        with PackedWriter(str(path)) as writer:
+            for i, ir in enumerate(irs):
+                writer.add(ir, f"puzzle{i + 1}.txt")
+    return write
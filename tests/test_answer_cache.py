@@ -0,0 +1,39 @@
+import answer_cache
+from answer_cache import AnswerCache, solve_cached
+
+PUZZLE = "A diz: 'B é um patife.'\nB diz: 'A e eu somos iguais.'"
+RENAMED = "X diz: 'Y é um patife.'\nY diz: 'X e eu somos iguais.'"
+
+
+def _count(cache, table):
+    return cache._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_renamed_puzzle_hits_the_same_entry(tmp_path):
+    cache = AnswerCache(str(tmp_path / "answers.sqlite"))
+    model, consequences = solve_cached(PUZZLE, cache)
+    hit = cache.get(answer_cache.parse_puzzle(RENAMED))
+    assert hit is not None
+    assert hit[1] == {"X": consequences["A"], "Y": consequences["B"]}
+    assert _count(cache, "answers") == 1
+
+
+def test_version_change_invalidates(tmp_path, monkeypatch):
+    path = str(tmp_path / "answers.sqlite")
+    cache = AnswerCache(path)
+    solve_cached(PUZZLE, cache)
+    cache.close()
+
+    monkeypatch.setattr(answer_cache, "CACHE_VERSION", answer_cache.CACHE_VERSION + "-next")
+    cache = AnswerCache(path)
+    assert _count(cache, "answers") == 0
+    assert cache.get(answer_cache.parse_puzzle(PUZZLE)) is None
+
+
+def test_answer_cache_stays_bounded(tmp_path):
+    cache = AnswerCache(str(tmp_path / "answers.sqlite"), max_entries=20)
+    for k in range(2, 40):
+        solve_cached("\n".join(f"P{i} diz: 'Eu sou um cavaleiro.'" for i in range(k)), cache)
+        assert _count(cache, "answers") <= 20
+    # Remoção em lote: passou do limite, volta a 90% dele
+    assert 18 <= _count(cache, "answers") == cache._count
@@ -0,0 +1,67 @@
+import json
+from concurrent.futures import Future
+import pytest
+import app as web
+from backends import puzzle_consequences
+
+PUZZLE = "A diz: 'B é um patife.'\nB diz: 'Eu sou um cavaleiro.'"
+
+
+def _solved(puzzle):
+    # Resolve no próprio processo, sem o pool de workers nem o cache em disco
+    future = Future()
+    try:
+        future.set_result(puzzle_consequences(puzzle.strip(), "z3"))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(web, "submit_puzzle", _solved)
+    return web.app.test_client()
+
+
+def _rows(response):
+    return sorted((json.loads(line) for line in response.get_data(as_text=True).splitlines()),
+                  key=lambda row: row["index"])
+
+
+def test_solve(client):
+    response = client.post("/api/solve", json={"puzzle": PUZZLE})
+    assert response.status_code == 200
+    assert response.get_json()["consequencias"] == {"A": "Patife (necessariamente falso)",
+                                                     "B": "Cavaleiro (necessariamente verdadeiro)"}
+
+
+def test_solve_unknown_person(client):
+    response = client.post("/api/solve", json={"puzzle": "A diz: 'Z é um patife.'"})
+    assert response.status_code == 400
+    assert response.get_json()["erro"] == "Pessoa desconhecida: Z"
+
+
+@pytest.mark.parametrize("body", ["{nao é json", '{"outra": []}', '"texto solto"'])
+def test_batch_rejects_malformed_json(client, body):
+    response = client.post("/api/solve/batch", data=body, content_type="application/json")
+    assert response.status_code == 400
+    assert "erro" in response.get_json()
+
+
+def test_batch_json(client):
+    response = client.post("/api/solve/batch", json={"puzzles": [PUZZLE, {"id": "x", "puzzle": PUZZLE}, {"id": "y"}]})
+    rows = _rows(response)
+    assert response.status_code == 200
+    assert [row["index"] for row in rows] == [0, 1, 2]
+    assert rows[1]["id"] == "x" and rows[1]["n"] == 2
+    assert rows[2]["id"] == "y" and "erro" in rows[2]
+
+
+def test_batch_ndjson_bad_line_gets_error_row(client):
+    body = "\n".join([json.dumps(PUZZLE), "{quebrado", json.dumps({"id": 7, "puzzle": "A diz: 'Z é um patife.'"}),
+                      json.dumps({"id": 8, "puzzle": PUZZLE})])
+    rows = _rows(client.post("/api/solve/batch", data=body, content_type="application/x-ndjson"))
+    assert [row["index"] for row in rows] == [0, 1, 2, 3]
+    assert "consequencias" in rows[0] and "consequencias" in rows[3]
+    assert "NDJSON" in rows[1]["erro"]
+    assert rows[2]["id"] == 7 and "Z" in rows[2]["erro"]
@@ -0,0 +1,42 @@
+import random
+import pytest
+import backends
+from backends import BACKENDS, BITS_MAX_N, choose_backend, ir_consequences
+from puzzle import sample_puzzle_ir, FORM_MIXES
+
+
+def _puzzles(count, sizes, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        n = rng.choice(sizes)
+        mix = rng.choice(["todas", "simples", "eu"] + (["pares"] if n >= 3 else []))
+        yield sample_puzzle_ir(n, forms=FORM_MIXES[mix], density=rng.randint(1, 2), rng=rng)
+
+
+@pytest.mark.parametrize("backend", ["bits", "gf2"])
+def test_backends_agree_with_z3(backend):
+    for ir in _puzzles(300, range(2, 9), seed=backend):
+        assert ir_consequences(ir, backend) == ir_consequences(ir, "z3"), ir
+
+
+def test_components_agree_with_whole_puzzle():
+    for ir in _puzzles(100, range(2, 12), seed="components"):
+        assert ir_consequences(ir, "z3", components=True) == ir_consequences(ir, "z3")
+
+
+def test_auto_picks_by_n():
+    assert choose_backend(BITS_MAX_N) == "bits"
+    assert choose_backend(BITS_MAX_N + 1) == "z3"
+    assert choose_backend(3, "gf2") == "gf2"
+    with pytest.raises(ValueError):
+        choose_backend(3, "nope")
+
+
+def test_answer_cache_uses_z3(tmp_path, monkeypatch):
+    from answer_cache import AnswerCache, solve_cached
+    used = []
+    solve_ir = backends.solve_ir
+    monkeypatch.setattr("answer_cache.solve_ir", lambda ir, backend="auto": used.append(backend) or solve_ir(ir, backend))
+    cache = AnswerCache(str(tmp_path / "cache.sqlite"))
+    solve_cached("A diz: 'B é um patife.'\nB diz: 'Eu sou um cavaleiro.'", cache)
+    assert used == ["z3"]
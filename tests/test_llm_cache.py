@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import pytest
+from llm_cache import ResponseCache, CachedProvider, ReplayMissError
+
+
+def _count(cache, table):
+    return cache._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path / "llm.sqlite"), max_entries=10)
+    for i in range(10):
+        cache.put(f"k{i}", "stub", "m", f"r{i}")
+    cache.get("k0")
+    cache.put("k0", "stub", "m", "r0")  # chave repetida não conta como entrada nova
+    assert _count(cache, "responses") == 10
+
+    cache.put("k10", "stub", "m", "r10")
+    assert _count(cache, "responses") == 9
+    assert cache.get("k0") == "r0"
+    assert cache.get("k1") is None
+
+
+def test_response_cache_ttl(tmp_path):
+    cache = ResponseCache(str(tmp_path / "llm.sqlite"), ttl=-1)
+    cache.put("k", "stub", "m", "r")
+    assert cache.get("k") is None
+    assert cache._count == 0
+
+
+class _Provider:
+    name, model, params = "fake", "m", {}
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt):
+        self.calls += 1
+        return prompt.upper()
+
+    async def agenerate(self, prompt):
+        self.calls += 1
+        return prompt.upper()
+
+
+def test_replay_miss_raises(tmp_path):
+    provider = CachedProvider(_Provider(), ResponseCache(str(tmp_path / "llm.sqlite")), mode="replay")
+    with pytest.raises(ReplayMissError):
+        provider.generate("oi")
+    assert provider.provider.calls == 0
+
+
+def test_agenerate_keeps_sqlite_off_the_event_loop(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "llm.sqlite"))
+    threads = []
+    for method in ("get", "put"):
+        original = getattr(cache, method)
+        monkeypatch.setattr(cache, method,
+                            lambda *a, original=original: threads.append(threading.get_ident()) or original(*a))
+    provider = CachedProvider(_Provider(), cache, mode="on")
+
+    async def run():
+        loop_thread = threading.get_ident()
+        first = await provider.agenerate("oi")
+        second = await provider.agenerate("oi")
+        return loop_thread, first, second
+
+    loop_thread, first, second = asyncio.run(run())
+    assert first == second == "OI"
+    assert provider.provider.calls == 1
+    assert len(threads) == 3 and loop_thread not in threads
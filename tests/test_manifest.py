@@ -0,0 +1,129 @@
+import os
+import random
+import threading
+import pytest
+from manifest import Manifest
+from backends import ir_consequences
+from puzzle import render_puzzle
+
+
+def _class(ir):
+    values = set(ir_consequences(ir, "z3").values())
+    if any("Inconsistente" in v for v in values):
+        return "inconsistent"
+    return "undetermined" if any("Indeterminado" in v for v in values) else "unique"
+
+
+def _assert_dense_slots(manifest):
+    for (n, classe), total in manifest.counts().items():
+        slots = sorted(slot for (slot,) in manifest._db.execute(
+            "SELECT slot FROM puzzles WHERE source = ? AND n = ? AND classe = ?", (manifest._key, n, classe)))
+        assert slots == list(range(total))
+
+
+@pytest.fixture
+def folder(tmp_path, make_irs):
+    irs = make_irs(40, "pasta", max_n=6, dense=True)
+    for i, ir in enumerate(irs):
+        (tmp_path / f"puzzle{i + 1}.txt").write_text(render_puzzle(ir), encoding="utf-8")
+    return tmp_path, irs
+
+
+def test_classes_match_z3(folder, tmp_path_factory):
+    path, irs = folder
+    manifest = Manifest(str(path), str(tmp_path_factory.mktemp("m") / "m.sqlite"))
+    assert manifest.refresh() == (40, 0)
+    assert manifest.refresh() == (0, 0)
+    for row in manifest.select():
+        ir = irs[int(row["arquivo"][6:-4]) - 1]
+        assert (row["n"], row["classe"]) == (len(ir.names), _class(ir))
+    manifest.close()
+
+
+def test_incremental_refresh(folder, tmp_path_factory):
+    path, _ = folder
+    manifest = Manifest(str(path), str(tmp_path_factory.mktemp("m") / "m.sqlite"))
+    manifest.refresh()
+    os.remove(path / "puzzle3.txt")
+    (path / "puzzle5.txt").write_text("A diz: 'B é um patife.'\nB diz: 'Eu sou um cavaleiro.'\n", encoding="utf-8")
+    (path / "lixo.txt").write_text("nada", encoding="utf-8")
+    assert manifest.refresh() == (2, 1)
+    assert sum(manifest.counts().values()) == 39
+    assert "puzzle3.txt" not in {row["arquivo"] for row in manifest.select()}
+    assert {"arquivo": "puzzle5.txt", "n": 2, "classe": "unique"}.items() <= \
+        next(r for r in manifest.select(n=2) if r["arquivo"] == "puzzle5.txt").items()
+    _assert_dense_slots(manifest)
+    manifest.close()
+
+
+def test_puzzle_edited_in_place_is_reclassified(tmp_path):
+    folder = tmp_path / "puzzles"
+    folder.mkdir()
+    puzzle = folder / "puzzle1.txt"
+    puzzle.write_text("A diz: 'B é um cavaleiro.'\nA diz: 'B é um patife.'\nB diz: 'Eu sou um cavaleiro.'",
+                      encoding="utf-8")
+    manifest = Manifest(str(folder), str(tmp_path / "m.sqlite"))
+    manifest.refresh()
+    assert manifest.counts() == {(2, "inconsistent"): 1}
+
+    folder_mtime = os.stat(folder).st_mtime_ns
+    puzzle.write_text("A diz: 'B é um cavaleiro.'\nB diz: 'A é um cavaleiro.'", encoding="utf-8")
+    os.utime(puzzle, ns=(folder_mtime + 10**9, folder_mtime + 10**9))
+    os.utime(folder, ns=(folder_mtime, folder_mtime))
+    assert manifest.refresh() == (1, 0)
+    assert manifest.counts() == {(2, "undetermined"): 1}
+    manifest.close()
+
+
+def test_sample_is_distinct_and_filtered(folder, tmp_path_factory):
+    path, _ = folder
+    manifest = Manifest(str(path), str(tmp_path_factory.mktemp("m") / "m.sqlite"))
+    manifest.refresh()
+    unique = {row["arquivo"] for row in manifest.select(classe="unique")}
+    names = manifest.sample(100, classe="unique", rng=random.Random(1))
+    assert len(names) == len(set(names)) == len(unique)
+    assert set(names) == unique
+    assert manifest.sample(5, n=99) == []
+    manifest.close()
+
+
+def test_refresh_after_packed_rewrite(tmp_path, make_irs, write_packed):
+    corpus = tmp_path / "c.kkc"
+    write_packed(corpus, make_irs(5, "antes", max_n=6, dense=True))
+    manifest = Manifest(str(corpus), str(tmp_path / "m.sqlite"))
+    manifest.refresh()
+    assert sum(manifest.counts().values()) == 5
+    depois = make_irs(10, "depois", max_n=6, dense=True)
+    write_packed(corpus, depois)
+    manifest.refresh()
+    assert sum(manifest.counts().values()) == 10
+    for row in manifest.select():
+        ir = depois[int(row["arquivo"][6:-4]) - 1]
+        assert (row["n"], row["classe"]) == (len(ir.names), _class(ir))
+    _assert_dense_slots(manifest)
+    manifest.close()
+
+
+def test_concurrent_sample_and_refresh(tmp_path, make_irs, write_packed):
+    corpus = tmp_path / "c.kkc"
+    write_packed(corpus, make_irs(30, "concorrente", max_n=6, dense=True))
+    manifest = Manifest(str(corpus), str(tmp_path / "m.sqlite"))
+    manifest.refresh()
+    errors = []
+
+    def sampler():
+        try:
+            for _ in range(300):
+                manifest.sample(3)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=sampler) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for _ in range(5):
+        manifest.refresh(force=True)
+    for t in threads:
+        t.join()
+    assert errors == []
+    manifest.close()
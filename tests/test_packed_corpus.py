@@ -0,0 +1,52 @@
+import os
+import pytest
+from packed_corpus import PackedCorpus, open_packed, import_txt, export_txt
+from puzzle import render_puzzle
+from puzzle_ir import parse_puzzle
+
+
+def test_round_trip(tmp_path, make_irs, write_packed):
+    irs = make_irs(50, "round-trip") + make_irs(5, "prefixo", prefix="P")
+    write_packed(tmp_path / "c.kkc", irs)
+    corpus = PackedCorpus(str(tmp_path / "c.kkc"))
+    assert len(corpus) == len(irs)
+    assert [ir for _, ir in corpus] == irs
+    assert corpus.find("puzzle7") == 6
+    assert parse_puzzle(corpus.text(6)) == irs[6]
+    corpus.close()
+
+
+def test_import_export_txt(tmp_path, make_irs):
+    source = tmp_path / "txt"
+    source.mkdir()
+    for i, ir in enumerate(make_irs(10, "txt")):
+        (source / f"puzzle{i + 1}.txt").write_text(render_puzzle(ir), encoding="utf-8")
+    assert import_txt(str(source), str(tmp_path / "c.kkc")) == 10
+    assert export_txt(str(tmp_path / "c.kkc"), str(tmp_path / "out")) == 10
+    for f in source.iterdir():
+        assert (tmp_path / "out" / f.name).read_text(encoding="utf-8") == f.read_text(encoding="utf-8")
+
+
+def test_open_packed_sees_rewritten_corpus(tmp_path, make_irs, write_packed):
+    path = tmp_path / "c.kkc"
+    write_packed(path, make_irs(5, "antes"))
+    assert len(open_packed(str(path))) == 5
+    depois = make_irs(10, "depois")
+    write_packed(path, depois)
+    corpus = open_packed(str(path))
+    assert len(corpus) == 10
+    assert corpus.ir(9) == depois[9]
+
+
+def test_failed_import_keeps_old_corpus(tmp_path, make_irs, write_packed):
+    path = tmp_path / "c.kkc"
+    antes = make_irs(3, "antes")
+    write_packed(path, antes)
+    source = tmp_path / "txt"
+    source.mkdir()
+    (source / "puzzle1.txt").write_text(render_puzzle(make_irs(1, "novo")[0]), encoding="utf-8")
+    (source / "puzzle2.txt").write_text("A diz: 'Z é um patife.'", encoding="utf-8")
+    with pytest.raises(ValueError, match="Pessoa desconhecida: Z"):
+        import_txt(str(source), str(path))
+    assert [ir for _, ir in PackedCorpus(str(path))] == antes
+    assert sorted(os.listdir(tmp_path)) == ["c.kkc", "txt"]
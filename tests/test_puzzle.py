@@ -0,0 +1,69 @@
+import random
+import pytest
+from backends import ir_consequences
+from puzzle import sample_puzzle_ir, sample_targeted_ir, render_puzzle, FORM_MIXES, EU_CAVALEIRO, EU_PATIFE
+from puzzle_ir import parse_puzzle
+
+
+def _determined(ir):
+    values = ir_consequences(ir, "z3").values()
+    assert not any("Inconsistente" in v for v in values)
+    return sum("necessariamente" in v for v in values)
+
+
+def test_seeded_generation_is_reproducible():
+    first = [sample_puzzle_ir(8, rng=random.Random(42)) for _ in range(3)]
+    assert first == [sample_puzzle_ir(8, rng=random.Random(42)) for _ in range(3)]
+    assert parse_puzzle(render_puzzle(first[0])) == first[0]
+
+
+@pytest.mark.parametrize("n", [3, 5, 8])
+def test_targeted_profiles(n):
+    rng = random.Random(n)
+    for k in range(n + 1):
+        ir = sample_targeted_ir(n, determined=k, rng=rng)
+        assert _determined(ir) == k
+        assert {s for s, _, _, _ in ir.statements} == set(range(n))
+    assert _determined(sample_targeted_ir(n, unique=True, rng=rng)) == n
+
+
+def test_required_statement_types():
+    ir = sample_targeted_ir(6, require={5: 2, 0: 1}, rng=random.Random(1))
+    ops = [op for _, op, _, _ in ir.statements]
+    assert ops.count(5) >= 2 and ops.count(0) >= 1
+
+
+@pytest.mark.parametrize("n, determined, mix", [(2, 1, "todas"), (4, 2, "simples"), (3, 1, "eu"),
+                                                (3, 1, "pares"), (3, 3, "pares"), (4, 2, "pares")])
+def test_unreachable_profile_is_rejected_up_front(n, determined, mix):
+    with pytest.raises(ValueError, match="exactly"):
+        sample_targeted_ir(n, determined=determined, forms=FORM_MIXES[mix], rng=random.Random(0))
+
+
+@pytest.mark.parametrize("n, determined", [(4, 1), (4, 4), (5, 2), (6, 3)])
+def test_reachable_pair_profiles(n, determined):
+    ir = sample_targeted_ir(n, determined=determined, forms=FORM_MIXES["pares"], rng=random.Random(n))
+    assert _determined(ir) == determined
+
+
+def test_two_people_one_determined_with_self_statements():
+    forms = FORM_MIXES["todas"] + [(EU_CAVALEIRO, 0), (EU_PATIFE, 0)]
+    for seed in range(10):
+        assert _determined(sample_targeted_ir(2, determined=1, forms=forms, rng=random.Random(seed))) == 1
+
+
+def test_reserved_numbers_are_disjoint(tmp_path):
+    from multiprocessing.pool import ThreadPool
+    from puzzle import reserve_puzzle_numbers
+    with ThreadPool(8) as pool:
+        firsts = pool.map(lambda _: reserve_puzzle_numbers(str(tmp_path), 10), range(40))
+    assert sorted(firsts) == list(range(1, 401, 10))
+
+
+def test_stale_counter_is_rebuilt(tmp_path):
+    from puzzle import reserve_puzzle_numbers, COUNTER_FILE
+    (tmp_path / "puzzle1.txt").write_text("A diz: 'Eu sou um cavaleiro.'", encoding="utf-8")
+    (tmp_path / "puzzle7.txt").write_text("A diz: 'Eu sou um cavaleiro.'", encoding="utf-8")
+    (tmp_path / COUNTER_FILE).write_text("7", encoding="utf-8")
+    assert reserve_puzzle_numbers(str(tmp_path)) == 8
+    assert reserve_puzzle_numbers(str(tmp_path), 3) == 9
@@ -0,0 +1,48 @@
+import pytest
+from puzzle_ir import (parse_puzzle, render_statement, connected_components, person_name, name_sort_key,
+                       STATEMENT_TEMPLATES, NO_REF, CAVALEIRO)
+
+
+def test_parse_every_statement_form():
+    names = ("A", "B", "C")
+    statements = tuple((op % 3, op, (op + 1) % 3 if "{r1}" in form else NO_REF,
+                        (op + 2) % 3 if "{r2}" in form else NO_REF)
+                       for op, form in sorted(STATEMENT_TEMPLATES.items()))
+    text = "\n".join(render_statement(names, s) for s in statements)
+    ir = parse_puzzle(text)
+    assert ir.names == names
+    assert ir.statements == statements
+
+
+def test_parse_errors():
+    with pytest.raises(ValueError):
+        parse_puzzle("Nada por aqui.")
+    with pytest.raises(ValueError):
+        parse_puzzle("A diz: 'Hoje está sol.'")
+    with pytest.raises(ValueError, match="Pessoa desconhecida: Z"):
+        parse_puzzle("A diz: 'Z é um patife.'")
+
+
+def test_names_in_natural_order():
+    assert [person_name(i) for i in (0, 25, 26, 27, 701, 702)] == ["A", "Z", "AA", "AB", "ZZ", "AAA"]
+    assert person_name(9, "P") == "P10"
+    assert sorted(["P10", "AA", "P2", "B"], key=name_sort_key) == ["B", "P2", "P10", "AA"]
+
+
+@pytest.mark.parametrize("prefix", [None, "P"])
+def test_more_than_26_people(prefix):
+    names = tuple(person_name(i, prefix) for i in range(30))
+    text = "\n".join(f"{names[i]} diz: '{names[(i + 1) % 30]} é um cavaleiro.'" for i in range(30))
+    ir = parse_puzzle(text)
+    assert ir.names == names
+    assert ir.statements[-1] == (29, CAVALEIRO, 0, NO_REF)
+
+
+def test_connected_components():
+    ir = parse_puzzle("A diz: 'C é um patife.'\nB diz: 'Eu sou um cavaleiro.'\n"
+                      "C diz: 'A e eu somos iguais.'\nD diz: 'B é um cavaleiro.'")
+    parts = {tuple(people): sub.names for people, sub in connected_components(ir)}
+    assert parts == {(0, 2): ("A", "C"), (1, 3): ("B", "D")}
+    for people, sub in connected_components(ir):
+        for s, op, ref1, ref2 in sub.statements:
+            assert (people[s], op) in {(x, o) for x, o, _, _ in ir.statements}
@@ -0,0 +1,71 @@
+import json
+import pytest
+import results_store
+from save_results import ResultsSink
+
+
+def _row(i, n=3):
+    names = [f"P{k}" for k in range(n)]
+    return {"puzzle": f"puzzle{i}.txt", "llm": {}, "z3_consequencias": {x: "Indeterminado (pode ser ambos)" for x in names},
+            "match": False, "model": "stub", "timestamp": "2026-01-01T00:00:00"}
+
+
+def test_sink_writes_and_flushes(tmp_path):
+    sink = ResultsSink(str(tmp_path / "r.jsonl"), str(tmp_path / "c.txt"), flush_interval=60, fsync=False)
+    for i in range(10):
+        sink.write(_row(i))
+    sink.flush()
+    lines = (tmp_path / "r.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["puzzle"] for line in lines] == [f"puzzle{i}.txt" for i in range(10)]
+    sink.close()
+
+
+def test_failed_batch_is_raised_by_flush_and_writer_survives(tmp_path, monkeypatch):
+    def broken(rows, root):
+        raise ValueError("parquet indisponível")
+    monkeypatch.setattr(results_store, "write_rows", broken)
+    sink = ResultsSink(str(tmp_path / "r.jsonl"), str(tmp_path / "c.txt"), flush_interval=60, fsync=False,
+                       parquet_dir=str(tmp_path / "parquet"))
+    sink.write(_row(1))
+    with pytest.raises(ValueError, match="parquet"):
+        sink.flush()
+    # Só o Parquet ficou sem o lote: o JSONL foi gravado
+    assert sink.failed == {str(tmp_path / "parquet"): 1}
+    assert "puzzle1.txt" in (tmp_path / "r.jsonl").read_text(encoding="utf-8")
+
+    monkeypatch.undo()
+    sink.parquet_dir = None
+    sink.write(_row(2))
+    sink.flush()  # o writer continua vivo e o erro já foi entregue
+    assert sink.failed == {str(tmp_path / "parquet"): 1}
+    assert "puzzle2.txt" in (tmp_path / "r.jsonl").read_text(encoding="utf-8")
+    sink.close()
+
+
+def test_comparacoes_only(tmp_path):
+    sink = ResultsSink(None, str(tmp_path / "c.txt"), flush_interval=60, fsync=False)
+    sink.write(_row(1))
+    sink.flush()
+    sink.close()
+    text = (tmp_path / "c.txt").read_text(encoding="utf-8")
+    assert text.startswith("puzzle1.txt | MATCH: False\nLLM: {}\nZ3:  ")
+    assert not (tmp_path / "r.jsonl").exists()
+
+
+@pytest.mark.skipif(not results_store.available(), reason="pyarrow não instalado")
+def test_large_n_goes_to_parquet(tmp_path):
+    sink = ResultsSink(str(tmp_path / "r.jsonl"), str(tmp_path / "c.txt"), flush_interval=60, fsync=False,
+                       parquet_dir=str(tmp_path / "parquet"))
+    sink.write(_row(1, n=40000))
+    sink.flush()
+    sink.close()
+
+
+def test_writer_does_not_update_analytics(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr("analytics.Analytics.catch_up", lambda *args: calls.append(args))
+    sink = ResultsSink(str(tmp_path / "r.jsonl"), str(tmp_path / "c.txt"), flush_interval=60, fsync=False)
+    sink.write(_row(1))
+    sink.flush()
+    sink.close()
+    assert calls == []
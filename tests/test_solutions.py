@@ -0,0 +1,37 @@
+import random
+import itertools
+import solverz3
+import solvergf2
+from puzzle import sample_puzzle_ir, FORM_MIXES
+from puzzle_ir import parse_puzzle, satisfies
+
+
+def _puzzles(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        n = rng.randint(2, 7)
+        mix = rng.choice(["todas", "simples", "eu"] + (["pares"] if n >= 3 else []))
+        yield sample_puzzle_ir(n, forms=FORM_MIXES[mix], density=rng.randint(1, 2), rng=rng)
+
+
+def _brute_force(ir):
+    return [values for values in itertools.product([False, True], repeat=len(ir.names))
+            if all(satisfies(values, s) for s in ir.statements)]
+
+
+def test_solution_counts_agree():
+    for ir in _puzzles(200, "counts"):
+        expected = _brute_force(ir)
+        variables, restrictions = solverz3.build_z3(ir)
+        models = list(solverz3.iter_solutions(variables, restrictions))
+        assert sorted(tuple(m[name] for name in ir.names) for m in models) == sorted(expected), ir
+        assert solvergf2.count_solutions(*solvergf2.build_gf2(ir)) == len(expected), ir
+
+
+def test_projected_solutions():
+    ir = parse_puzzle("A diz: 'B é um cavaleiro.'\nB diz: 'A é um cavaleiro.'\n"
+                      "C diz: 'D é um cavaleiro.'\nD diz: 'C é um cavaleiro.'")
+    variables, restrictions = solverz3.build_z3(ir)
+    assert solverz3.count_solutions(variables, restrictions) == 4
+    assert solverz3.count_solutions(variables, restrictions, project=["A"]) == 2
+    assert solverz3.count_solutions(variables, restrictions, cap=3) == 3
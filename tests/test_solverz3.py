@@ -0,0 +1,32 @@
+from solverz3 import parse_puzzle_to_z3, logical_consequences
+
+CAVALEIRO = "Cavaleiro (necessariamente verdadeiro)"
+PATIFE = "Patife (necessariamente falso)"
+INDETERMINADO = "Indeterminado (pode ser ambos)"
+INCONSISTENTE = "Inconsistente (sem modelo possível)"
+
+
+def _consequences(text):
+    return logical_consequences(*parse_puzzle_to_z3(text))
+
+
+def test_forced():
+    # B cavaleiro: A mente (B não é patife) e B diz a verdade (A e B diferem);
+    # B patife: A diria a verdade, mas então A e B seriam diferentes, como B nega
+    assert _consequences("A diz: 'B é um patife.'\nB diz: 'A e eu somos diferentes.'") == {
+        "A": PATIFE, "B": CAVALEIRO}
+
+
+def test_undetermined_next_to_forced():
+    # A e B só se confirmam um ao outro (ambos cavaleiros ou ambos patifes);
+    # D cavaleiro tornaria C cavaleiro, mas C chama D de patife: contradição.
+    # Logo D é patife e C, que diz a verdade, é cavaleiro
+    assert _consequences("A diz: 'B é um cavaleiro.'\nB diz: 'A é um cavaleiro.'\n"
+                         "C diz: 'D é um patife.'\nD diz: 'C e eu somos iguais.'") == {
+        "A": INDETERMINADO, "B": INDETERMINADO, "C": CAVALEIRO, "D": PATIFE}
+
+
+def test_inconsistent():
+    # A afirma que B é cavaleiro e também que B é patife
+    assert _consequences("A diz: 'B é um cavaleiro.'\nA diz: 'B é um patife.'\n"
+                         "B diz: 'Eu sou um cavaleiro.'") == {"A": INCONSISTENTE, "B": INCONSISTENTE}